@@ -1,10 +1,19 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import pandas as pd
 import scipy.stats as st
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 RUNS_DIR = "runs"
 OUTPUT_DIR = "analysis"
@@ -12,42 +21,116 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 PROTOCOLS = ["CoT", "Socratic", "Congress", "British"]
 
+# Parsed rows are cached on disk, keyed by each summary's (mtime_ns, size)
+# and CACHE_VERSION; bump it whenever parse_summaries' output changes
+CACHE_VERSION = 1
+CACHE_DIR = os.path.join(OUTPUT_DIR, ".cache")
+RUNS_CACHE = os.path.join(CACHE_DIR, "runs.parquet")
+RUNS_MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+
 
 # ------------------------------------------------------
 # Load summary.json for all runs
 # ------------------------------------------------------
-def load_all_runs():
-    run_rows = []
-
-    for run_name in sorted(os.listdir(RUNS_DIR)):
-        if not run_name.startswith("run_"):
-            continue
-
-        summary_path = os.path.join(RUNS_DIR, run_name, "summary.json")
-        if not os.path.exists(summary_path):
-            continue
-
-        with open(summary_path, "r") as f:
-            summary = json.load(f)
+def _read_summary(path):
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        summary = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    summary["source"] = path
+    return summary
+
+
+def parse_summaries(paths):
+    """Parses summary.json files into one row per (source, run_id, protocol)."""
+
+    # File reads are I/O-bound, so overlap them across threads
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        summaries = [s for s in executor.map(_read_summary, paths) if s is not None]
+    if not summaries:
+        return pd.DataFrame(columns=["source", "run_id", "protocol"])
+
+    # Flatten to one wide row per run: protocols.<name>.<metric> columns
+    wide = pd.json_normalize(summaries).set_index(["source", "run_id"]).filter(like="protocols.")
+    wide.columns = pd.MultiIndex.from_tuples(
+        [tuple(col.split(".", 2)[1:]) for col in wide.columns],
+        names=["protocol", "metric"],
+    )
 
-        run_id = summary["run_id"]
-        proto_data = summary["protocols"]
+    # Reshape to one row per (run_id, protocol); runs missing a protocol
+    # produce all-NaN rows which are dropped
+    return wide.stack(level="protocol").dropna(how="all").reset_index().rename_axis(columns=None)
+
+
+def load_cache():
+    """Returns (file stamps, rows) from the cache, or ({}, None) if it can't be used."""
+    try:
+        with open(RUNS_MANIFEST, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != CACHE_VERSION:
+            return {}, None
+        rows = pd.read_parquet(RUNS_CACHE)
+        return manifest["files"], rows
+    except Exception as e:
+        # Missing, truncated or corrupt cache, or no parquet engine: rebuild
+        # from the summary files instead
+        if not isinstance(e, (FileNotFoundError, ImportError)):
+            print(f"Ignoring unreadable cache in {CACHE_DIR}: {e}")
+        return {}, None
+
+
+def save_cache(manifest, rows):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        rows.to_parquet(RUNS_CACHE, index=False)
+    except ImportError:
+        # No parquet engine installed; run without a cache
+        return
+    with open(RUNS_MANIFEST, "w") as f:
+        json.dump({"version": CACHE_VERSION, "files": manifest}, f)
 
-        for proto in PROTOCOLS:
-            if proto not in proto_data:
-                continue
 
-            row = {
-                "run_id": run_id,
-                "protocol": proto,
-                "accuracy": proto_data[proto]["accuracy"],
-                "prompt_tokens": proto_data[proto]["prompt_tokens"],
-                "completion_tokens": proto_data[proto]["completion_tokens"],
-                "total_tokens": proto_data[proto]["total_tokens"],
-            }
-            run_rows.append(row)
+def load_all_runs():
+    # One directory scan; a missing summary.json fails fast on stat
+    entries = sorted(
+        (e for e in os.scandir(RUNS_DIR) if e.is_dir() and e.name.startswith("run_")),
+        key=lambda e: e.name,
+    )
 
-    df = pd.DataFrame(run_rows)
+    paths = []
+    manifest = {}
+    for e in entries:
+        summary_path = os.path.join(e.path, "summary.json")
+        try:
+            stat = os.stat(summary_path)
+        except FileNotFoundError:
+            continue
+        paths.append(summary_path)
+        manifest[summary_path] = [stat.st_mtime_ns, stat.st_size]
+
+    # Only re-parse summaries that are new or changed since the last run
+    cached_manifest, cached_rows = load_cache()
+    if cached_rows is None:
+        cached_manifest = {}
+    stale = [p for p in paths if cached_manifest.get(p) != manifest[p]]
+
+    parts = []
+    if cached_rows is not None:
+        fresh = cached_rows.source.isin(manifest) & ~cached_rows.source.isin(stale)
+        parts.append(cached_rows[fresh])
+    if stale:
+        parts.append(parse_summaries(stale))
+    rows = pd.concat(parts, ignore_index=True)
+
+    if stale or cached_manifest.keys() != manifest.keys():
+        save_cache(manifest, rows)
+
+    df = rows[rows.protocol.isin(PROTOCOLS)].copy()
+    df["protocol"] = pd.Categorical(df["protocol"], categories=PROTOCOLS, ordered=True)
+
+    df = df[["run_id", "protocol", "accuracy", "prompt_tokens", "completion_tokens", "total_tokens"]]
     df = df.sort_values(["protocol", "run_id"])
     return df
 
@@ -56,13 +139,20 @@ def load_all_runs():
 # Compute mean, std, stderr per protocol
 # ------------------------------------------------------
 def compute_protocol_stats(df):
-    stats = df.groupby("protocol").agg(
+    # Built-in aggregations only; stderr is derived from std and count
+    # afterwards so no per-group Python callback is needed
+    g = df.groupby("protocol", sort=False, observed=True)
+    stats = g.agg(
         accuracy_mean=("accuracy", "mean"),
         accuracy_std=("accuracy", "std"),
-        accuracy_stderr=("accuracy", lambda x: x.std() / np.sqrt(len(x))),
+        n=("accuracy", "size"),
         tokens_mean=("total_tokens", "mean"),
         tokens_std=("total_tokens", "std"),
-    ).reset_index()
+    )
+    stats["accuracy_stderr"] = stats["accuracy_std"] / np.sqrt(stats["n"])
+    stats = stats[
+        ["accuracy_mean", "accuracy_std", "accuracy_stderr", "tokens_mean", "tokens_std"]
+    ].reset_index()
 
     stats_path = os.path.join(OUTPUT_DIR, "protocol_stats.csv")
     stats.to_csv(stats_path, index=False)
@@ -74,42 +164,49 @@ def compute_protocol_stats(df):
 # ------------------------------------------------------
 # Paired t-tests between protocols
 # ------------------------------------------------------
-def paired_test(df, proto_a, proto_b):
-    """Returns t-stat, p-value, effect size, CI."""
+def paired_tests(df, comparisons):
+    """Returns t-stat, p-value, effect size, CI for every (A, B) comparison."""
+
+    # One C-contiguous float64 (n_runs x n_protocols) accuracy matrix,
+    # built once; columns follow PROTOCOLS so they can be indexed by position
+    wide = df.pivot(index="run_id", columns="protocol", values="accuracy")
+    wide = wide.reindex(columns=PROTOCOLS)
+    mat = np.ascontiguousarray(wide.to_numpy(dtype=np.float64))
 
-    df_a = df[df.protocol == proto_a].sort_values("run_id")
-    df_b = df[df.protocol == proto_b].sort_values("run_id")
+    ia = [PROTOCOLS.index(a) for a, _ in comparisons]
+    ib = [PROTOCOLS.index(b) for _, b in comparisons]
 
-    acc_a = df_a["accuracy"].values
-    acc_b = df_b["accuracy"].values
+    acc_a = mat[:, ia]
+    acc_b = mat[:, ib]
 
-    # Differences
+    # Differences, one column per comparison
     d = acc_a - acc_b
+    d_mean = d.mean(axis=0)
 
-    # Paired t-test
-    t_stat, p_value = st.ttest_rel(acc_a, acc_b)
+    # Paired t-tests, all comparisons in one call
+    t_stat, p_value = st.ttest_rel(acc_a, acc_b, axis=0)
 
     # Effect size (Cohen's d)
-    effect = d.mean() / d.std(ddof=1)
+    effect = d_mean / d.std(axis=0, ddof=1)
 
     # 95% CI of mean difference
     ci_low, ci_high = st.t.interval(
         confidence=0.95,
         df=len(d) - 1,
-        loc=d.mean(),
-        scale=st.sem(d)
+        loc=d_mean,
+        scale=st.sem(d, axis=0)
     )
 
-    return {
-        "A": proto_a,
-        "B": proto_b,
-        "mean_diff": d.mean(),
+    return pd.DataFrame({
+        "A": [a for a, _ in comparisons],
+        "B": [b for _, b in comparisons],
+        "mean_diff": d_mean,
         "t_stat": t_stat,
         "p_value": p_value,
         "effect_size": effect,
         "ci_low": ci_low,
         "ci_high": ci_high,
-    }
+    })
 
 
 def run_pairwise_tests(df):
@@ -122,13 +219,10 @@ def run_pairwise_tests(df):
         ("British", "Socratic"),
     ]
 
-    results = []
     for A, B in comparisons:
         print(f"Running paired t-test: {A} vs {B}")
-        stats = paired_test(df, A, B)
-        results.append(stats)
+    df_stats = paired_tests(df, comparisons)
 
-    df_stats = pd.DataFrame(results)
     out_path = os.path.join(OUTPUT_DIR, "pairwise_tests.csv")
     df_stats.to_csv(out_path, index=False)
     print(f"Saved pairwise statistical tests → {out_path}")
@@ -139,49 +233,59 @@ def run_pairwise_tests(df):
 # ------------------------------------------------------
 # Plot accuracy distributions
 # ------------------------------------------------------
-def plot_accuracy_boxplots(df):
-    plt.figure(figsize=(8, 6))
-    df.boxplot(column="accuracy", by="protocol", grid=False)
-    plt.title("Accuracy distribution across protocols")
-    plt.suptitle("")
-    plt.ylabel("Accuracy")
+def plot_accuracy_boxplots(df, ax):
+    # One accuracy array per protocol, extracted in a single groupby pass
+    labels, groups = [], []
+    for proto, g in df.groupby("protocol", sort=False, observed=True):
+        labels.append(proto)
+        groups.append(g["accuracy"].to_numpy())
+
+    ax.cla()
+    ax.boxplot(groups)
+    ax.set_xticks(range(1, len(labels) + 1), labels)
+    ax.set_title("Accuracy distribution across protocols")
+    ax.set_ylabel("Accuracy")
 
     out_path = os.path.join(OUTPUT_DIR, "accuracy_boxplot.png")
-    plt.savefig(out_path, dpi=150)
+    ax.figure.savefig(out_path, dpi=150)
     print(f"Saved accuracy boxplot → {out_path}")
-    plt.close()
 
 
 # ------------------------------------------------------
 # Token usage plot
 # ------------------------------------------------------
-def plot_token_usage(df):
-    tok_stats = df.groupby("protocol")["total_tokens"].mean()
+def plot_token_usage(df, ax):
+    tok_stats = df.groupby("protocol", observed=True)["total_tokens"].mean()
 
-    plt.figure(figsize=(8, 6))
-    tok_stats.plot(kind="bar", color=["#4e79a7", "#f28e2b", "#e15759", "#76b7b2"])
+    ax.cla()
+    tok_stats.plot(kind="bar", ax=ax, color=["#4e79a7", "#f28e2b", "#e15759", "#76b7b2"])
 
-    plt.ylabel("Average Token Usage per Run")
-    plt.title("Mean Token Usage for Each Protocol")
+    ax.set_ylabel("Average Token Usage per Run")
+    ax.set_title("Mean Token Usage for Each Protocol")
 
     out_path = os.path.join(OUTPUT_DIR, "token_usage.png")
-    plt.savefig(out_path, dpi=150)
+    ax.figure.savefig(out_path, dpi=150)
     print(f"Saved token usage plot → {out_path}")
-    plt.close()
+
+
+# ------------------------------------------------------
+# Mean ± Standard Error of a column per protocol
+# ------------------------------------------------------
+def mean_stderr(df, column):
+    stats = df.groupby("protocol", observed=True)[column].agg(mean="mean", std="std", n="size")
+    stats["stderr"] = stats["std"] / np.sqrt(stats["n"])
+    return stats
 
 
 # ------------------------------------------------------
 # Mean ± Standard Error accuracy plot
 # ------------------------------------------------------
-def plot_accuracy_mean_stderr(df):
-    stats = df.groupby("protocol")["accuracy"].agg(
-        mean="mean",
-        stderr=lambda x: x.std(ddof=1) / np.sqrt(len(x))
-    )
+def plot_accuracy_mean_stderr(df, ax):
+    stats = mean_stderr(df, "accuracy")
 
-    plt.figure(figsize=(8, 6))
+    ax.cla()
 
-    plt.bar(
+    ax.bar(
         stats.index,
         stats["mean"],
         yerr=stats["stderr"],
@@ -189,29 +293,25 @@ def plot_accuracy_mean_stderr(df):
         color=["#4e79a7", "#f28e2b", "#e15759", "#76b7b2"]
     )
 
-    plt.ylabel("Accuracy")
-    plt.title("Mean Accuracy ± Standard Error by Protocol")
-    plt.ylim(0.5, 0.75)
-    plt.grid(axis="y", linestyle="--", alpha=0.5)
+    ax.set_ylabel("Accuracy")
+    ax.set_title("Mean Accuracy ± Standard Error by Protocol")
+    ax.set_ylim(0.5, 0.75)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
 
     out_path = os.path.join(OUTPUT_DIR, "accuracy_mean_stderr.png")
-    plt.savefig(out_path, dpi=150)
+    ax.figure.savefig(out_path, dpi=150)
     print(f"Saved mean ± stderr accuracy plot → {out_path}")
-    plt.close()
 
 
 # ------------------------------------------------------
 # Mean ± Standard Error token usage plot
 # ------------------------------------------------------
-def plot_token_mean_stderr(df):
-    stats = df.groupby("protocol")["total_tokens"].agg(
-        mean="mean",
-        stderr=lambda x: x.std(ddof=1) / np.sqrt(len(x))
-    )
+def plot_token_mean_stderr(df, ax):
+    stats = mean_stderr(df, "total_tokens")
 
-    plt.figure(figsize=(8, 6))
+    ax.cla()
 
-    plt.bar(
+    ax.bar(
         stats.index,
         stats["mean"],
         yerr=stats["stderr"],
@@ -219,14 +319,13 @@ def plot_token_mean_stderr(df):
         color=["#4e79a7", "#f28e2b", "#e15759", "#76b7b2"]
     )
 
-    plt.ylabel("Total Token Usage")
-    plt.title("Mean Total Token Usage ± Standard Error by Protocol")
-    plt.grid(axis="y", linestyle="--", alpha=0.5)
+    ax.set_ylabel("Total Token Usage")
+    ax.set_title("Mean Total Token Usage ± Standard Error by Protocol")
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
 
     out_path = os.path.join(OUTPUT_DIR, "token_mean_stderr.png")
-    plt.savefig(out_path, dpi=150)
+    ax.figure.savefig(out_path, dpi=150)
     print(f"Saved mean ± stderr token plot → {out_path}")
-    plt.close()
 
 
 # ------------------------------------------------------
@@ -243,16 +342,21 @@ if __name__ == "__main__":
     print("\nRunning pairwise statistical tests...")
     pairwise = run_pairwise_tests(df)
 
+    # One figure is reused by every plot; each plot clears the axes first
+    fig, ax = plt.subplots(figsize=(8, 6))
+
     # print("\nGenerating accuracy boxplots...")
-    # plot_accuracy_boxplots(df)
+    # plot_accuracy_boxplots(df, ax)
 
     print("\nGenerating token usage plot...")
-    plot_token_usage(df)
+    plot_token_usage(df, ax)
 
     print("\nGenerating mean ± stderr accuracy plot...")
-    plot_accuracy_mean_stderr(df)
+    plot_accuracy_mean_stderr(df, ax)
 
     print("\nGenerating mean ± stderr token plot...")
-    plot_token_mean_stderr(df)
+    plot_token_mean_stderr(df, ax)
+
+    plt.close(fig)
 
     print("\nDone! All analysis saved in /analysis/")
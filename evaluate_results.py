@@ -1,12 +1,27 @@
 import os
+import re
 import json
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 RESULTS_DIR = "results"
 OUTPUT_DIR = "evaluation"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Parsed metadata is cached on disk, keyed by each file's (mtime_ns, size)
+CACHE_PATH = os.path.join(OUTPUT_DIR, ".cache", "metadata.json")
+
+PROTOCOLS = ["CoT", "Socratic", "Congress", "British"]
+
 # Mapping from long class names → short names
 NAME_MAP = {
     "AmericanCongressProtocol": "Congress",
@@ -15,6 +30,16 @@ NAME_MAP = {
     "SocraticDialogueProtocol": "Socratic",
 }
 
+# Batch files are named <Protocol>_<dataset>_<start>_<end>.json
+BATCH_RE = re.compile(r"_(\d+)_\d+\.json$")
+
+
+def batch_start(filename):
+    """Returns the first question index of a batch file, or -1 if the name has none."""
+    m = BATCH_RE.search(filename)
+    return int(m.group(1)) if m else -1
+
+
 def short_name(protocol):
     for long, short in NAME_MAP.items():
         if protocol.startswith(long):
@@ -24,94 +49,114 @@ def short_name(protocol):
 
 def load_json(path):
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
     except Exception as e:
         print(f"Error loading {path}: {e}")
         return None
 
 
-def aggregate_results():
-    files = [f for f in os.listdir(RESULTS_DIR) if f.endswith(".json")]
+def load_metadata_cache():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    return load_json(CACHE_PATH) or {}
 
-    protocol_groups = {}
 
-    # Group files by *short* protocol name
-    for filename in files:
-        original_prefix = filename.split("_hotpot_qa")[0]
-        protocol = short_name(original_prefix)
+def save_metadata_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, "w") as f:
+        json.dump(cache, f)
 
-        protocol_groups.setdefault(protocol, []).append(
-            os.path.join(RESULTS_DIR, filename)
-        )
 
-    summary_rows = []
-    plot_data = []
-    token_summary_rows = []
-
-    for protocol, file_list in protocol_groups.items():
-        file_list.sort()  # Ensure 0–9, 10–19 order
-
-        total_correct = 0
-        total_count = 0
-        total_prompt_tokens = 0
-        total_completion_tokens = 0
-
-        print(f"\n=== Processing {protocol} ({len(file_list)} files) ===")
-
-        for file_path in file_list:
-            data = load_json(file_path)
-            if data is None:
-                continue
-
-            meta = data["metadata"]
-            acc = meta["accuracy"]
-            correct = meta["correct_count"]
-            count = meta["total_count"]
-
-            prompt_tok = meta.get("prompt_tokens", 0)
-            comp_tok = meta.get("completion_tokens", 0)
-            total_tok = meta.get("total_tokens", 0)
-
-            total_prompt_tokens += prompt_tok
-            total_completion_tokens += comp_tok
-
-            total_correct += correct
-            total_count += count
-
-            plot_data.append({
-                "protocol": protocol,
-                "file": os.path.basename(file_path),
-                "batch_accuracy": acc
-            })
-
-            print(f"{os.path.basename(file_path)} → acc={acc:.3f} ({correct}/{count}), tokens={total_tok}")
-
-        overall_accuracy = total_correct / total_count if total_count > 0 else 0
-        total_tokens = total_prompt_tokens + total_completion_tokens
-        tokens_per_question = total_tokens / total_count if total_count > 0 else 0
-
-        summary_rows.append({
-            "protocol": protocol,
-            "accuracy": overall_accuracy,
-            "correct": total_correct,
-            "total": total_count,
-            "prompt_tokens": total_prompt_tokens,
-            "completion_tokens": total_completion_tokens,
-            "total_tokens": total_tokens,
-            "tokens_per_question": tokens_per_question,
+def load_metadata(path, cache):
+    """Returns the metadata block of a results file, re-parsing only if it changed."""
+    stat = os.stat(path)
+    stamp = [stat.st_mtime_ns, stat.st_size]
+
+    entry = cache.get(path)
+    if entry is not None and entry["stamp"] == stamp:
+        return entry["metadata"]
+
+    data = load_json(path)
+    if data is None:
+        return None
+
+    cache[path] = {"stamp": stamp, "metadata": data["metadata"]}
+    return data["metadata"]
+
+
+def aggregate_results():
+    paths = sorted(
+        e.path for e in os.scandir(RESULTS_DIR)
+        if e.is_file() and e.name.endswith(".json")
+    )
+
+    cache = load_metadata_cache()
+
+    # File reads are I/O-bound, so overlap them across threads
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        metas = list(executor.map(lambda p: load_metadata(p, cache), paths))
+
+    save_metadata_cache(cache)
+
+    # One flat row per batch file, grouped by *short* protocol name
+    rows = []
+    for file_path, meta in zip(paths, metas):
+        if meta is None:
+            continue
+
+        filename = os.path.basename(file_path)
+        rows.append({
+            "protocol": short_name(filename.split("_hotpot_qa")[0]),
+            "file": filename,
+            "batch_start": batch_start(filename),
+            "batch_accuracy": meta["accuracy"],
+            "correct": meta["correct_count"],
+            "total": meta["total_count"],
+            "prompt_tokens": meta.get("prompt_tokens", 0),
+            "completion_tokens": meta.get("completion_tokens", 0),
         })
 
-        print(f"→ FINAL {protocol}: {overall_accuracy:.3f} ({total_correct}/{total_count}), total_tokens={total_tokens}")
+        print(f"{filename} → acc={meta['accuracy']:.3f} ({meta['correct_count']}/{meta['total_count']}), "
+              f"tokens={meta.get('total_tokens', 0)}")
+
+    df = pd.DataFrame(rows)
+
+    # Known protocols first, in their canonical order; unmapped names after
+    extra = sorted(set(df["protocol"]) - set(PROTOCOLS))
+    df["protocol"] = pd.Categorical(df["protocol"], categories=PROTOCOLS + extra, ordered=True)
+
+    # Order batches numerically (0, 10, 20, ... rather than 0, 10, 100, 20)
+    df = df.sort_values(["protocol", "batch_start"], kind="stable")
+
+    summary_df = df.groupby("protocol", sort=False, observed=True).agg(
+        correct=("correct", "sum"),
+        total=("total", "sum"),
+        prompt_tokens=("prompt_tokens", "sum"),
+        completion_tokens=("completion_tokens", "sum"),
+    ).reset_index()
+
+    has_items = summary_df["total"] > 0
+    summary_df["accuracy"] = (summary_df["correct"] / summary_df["total"]).where(has_items, 0.0)
+    summary_df["total_tokens"] = summary_df["prompt_tokens"] + summary_df["completion_tokens"]
+    summary_df["tokens_per_question"] = (summary_df["total_tokens"] / summary_df["total"]).where(has_items, 0.0)
+
+    summary_df = summary_df[[
+        "protocol", "accuracy", "correct", "total",
+        "prompt_tokens", "completion_tokens", "total_tokens", "tokens_per_question",
+    ]]
+
+    for r in summary_df.itertuples():
+        print(f"→ FINAL {r.protocol}: {r.accuracy:.3f} ({r.correct}/{r.total}), total_tokens={r.total_tokens}")
 
     # Save summary
-    summary_df = pd.DataFrame(summary_rows)
     summary_path = os.path.join(OUTPUT_DIR, "summary.csv")
     summary_df.to_csv(summary_path, index=False)
     print(f"\nSaved summary to {summary_path}")
 
     # Save batch data
-    plot_df = pd.DataFrame(plot_data)
+    plot_df = df[["protocol", "file", "batch_start", "batch_accuracy"]]
     batch_path = os.path.join(OUTPUT_DIR, "batch_accuracy.csv")
     plot_df.to_csv(batch_path, index=False)
     print(f"Saved batch accuracy to {batch_path}")
@@ -119,9 +164,10 @@ def aggregate_results():
     return summary_df, plot_df
 
 
-def plot_summary(summary_df):
-    plt.figure(figsize=(8, 5))
-    plt.bar(
+def plot_summary(summary_df, ax):
+    ax.cla()
+    ax.figure.set_size_inches(8, 5)
+    ax.bar(
         summary_df["protocol"], 
         summary_df["accuracy"], 
         color=["#4e79a7", "#f28e2b", "#e15759", "#76b7b2"]
@@ -129,7 +175,7 @@ def plot_summary(summary_df):
 
     for i, v in enumerate(summary_df["accuracy"]):
         pct = int(round(v * 100))
-        plt.text(
+        ax.text(
             i,
             v + 0.03,
             f"{pct}%",
@@ -138,21 +184,21 @@ def plot_summary(summary_df):
             fontsize=11
         )
 
-    plt.ylabel("Accuracy")
-    plt.title("Accuracy by Protocol (HotpotQA 100 samples)")
-    plt.ylim(0, 1)
-    plt.grid(axis="y", linestyle="--", alpha=0.6)
+    ax.set_ylabel("Accuracy")
+    ax.set_title("Accuracy by Protocol (HotpotQA 100 samples)")
+    ax.set_ylim(0, 1)
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
 
     out_path = os.path.join(OUTPUT_DIR, "accuracy_plot.png")
-    plt.savefig(out_path)
+    ax.figure.savefig(out_path)
     print(f"Saved plot to {out_path}")
-    plt.close()
 
 
-def plot_token_usage(summary_df):
-    plt.figure(figsize=(8, 5))
+def plot_token_usage(summary_df, ax):
+    ax.cla()
+    ax.figure.set_size_inches(8, 5)
 
-    plt.bar(
+    ax.bar(
         summary_df["protocol"],
         summary_df["total_tokens"],
         color=["#59a14f", "#edc948", "#af7aa1", "#ff9da7"]
@@ -160,7 +206,7 @@ def plot_token_usage(summary_df):
 
     # Annotate tokens above bars
     for i, v in enumerate(summary_df["total_tokens"]):
-        plt.text(
+        ax.text(
             i,
             v * 1.02,
             f"{int(v):,} tokens",
@@ -169,37 +215,43 @@ def plot_token_usage(summary_df):
             fontsize=10
         )
 
-    plt.ylabel("Total Tokens Used")
-    plt.title("Token Usage by Protocol")
-    plt.grid(axis="y", linestyle="--", alpha=0.6)
+    ax.set_ylabel("Total Tokens Used")
+    ax.set_title("Token Usage by Protocol")
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
 
     out_path = os.path.join(OUTPUT_DIR, "token_usage_plot.png")
-    plt.savefig(out_path)
+    ax.figure.savefig(out_path)
     print(f"Saved token usage plot to {out_path}")
-    plt.close()
 
 
-def plot_batch_accuracy(plot_df):
-    plt.figure(figsize=(10, 6))
+def plot_batch_accuracy(plot_df, ax):
+    ax.cla()
+    ax.figure.set_size_inches(10, 6)
 
-    for protocol in plot_df["protocol"].unique():
-        df = plot_df[plot_df["protocol"] == protocol]
-        plt.plot(df["file"], df["batch_accuracy"], marker="o", label=protocol)
+    # One column per protocol, rows kept in the (protocol, batch_start) order
+    wide = plot_df.pivot(index="file", columns="protocol", values="batch_accuracy")
+    wide = wide.reindex(plot_df["file"].unique())
+    wide.plot(ax=ax, marker="o")
 
-    plt.xticks(rotation=90)
-    plt.ylabel("Accuracy")
-    plt.title("Accuracy Across Batches (Every 10 Questions)")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.6)
+    ax.set_xticks(range(len(wide.index)))
+    ax.set_xticklabels(wide.index, rotation=90)
+    ax.set_xlabel("")
+    ax.set_ylabel("Accuracy")
+    ax.set_title("Accuracy Across Batches (Every 10 Questions)")
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.6)
 
     out_path = os.path.join(OUTPUT_DIR, "batch_plot.png")
-    plt.savefig(out_path, bbox_inches="tight")
+    ax.figure.savefig(out_path, bbox_inches="tight")
     print(f"Saved plot to {out_path}")
-    plt.close()
 
 
 if __name__ == "__main__":
     summary_df, plot_df = aggregate_results()
-    plot_summary(summary_df)
-    plot_token_usage(summary_df)   # ← NEW FIGURE
-    plot_batch_accuracy(plot_df)
+
+    # One figure is reused by every plot; each plot clears the axes first
+    fig, ax = plt.subplots()
+    plot_summary(summary_df, ax)
+    plot_token_usage(summary_df, ax)   # ← NEW FIGURE
+    plot_batch_accuracy(plot_df, ax)
+    plt.close(fig)
@@ -1,6 +1,10 @@
 import argparse
 import os
 import json
+import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from src.llm.providers import OpenAIProvider, AnthropicProvider, GeminiProvider
@@ -14,107 +18,200 @@ from src.experiment.runner import ExperimentRunner
 from dotenv import load_dotenv
 load_dotenv()
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# -------------------------------------------------------------
+# Helper: accuracy + token counts from a results metadata block
+# -------------------------------------------------------------
+def summarize_metadata(meta):
+    return {
+        "accuracy": meta["accuracy"],
+        "prompt_tokens": meta.get("prompt_tokens", 0),
+        "completion_tokens": meta.get("completion_tokens", 0),
+        "total_tokens": meta.get("total_tokens", 0),
+    }
+
 
 # -------------------------------------------------------------
 # Helper: extract accuracy + token counts from a results file
 # -------------------------------------------------------------
 def load_metadata(path):
-    with open(path, "r") as f:
-        data = json.load(f)
-        meta = data["metadata"]
-        return {
-            "accuracy": meta["accuracy"],
-            "prompt_tokens": meta.get("prompt_tokens", 0),
-            "completion_tokens": meta.get("completion_tokens", 0),
-            "total_tokens": meta.get("total_tokens", 0),
-        }
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return summarize_metadata(data["metadata"])
 
 
-def main():
+# -------------------------------------------------------------
+# Experiment configuration
+# -------------------------------------------------------------
+RUNS = 28
+RESULTS_ROOT = "runs"
 
-    parser = argparse.ArgumentParser(description="Multi-Agent Debate Experiment Runner")
-    parser.add_argument("--dataset", type=str, default="hotpot_qa",
-                        choices=["hotpot_qa", "cais/mmlu"], help="Dataset")
-    parser.add_argument("--provider", type=str, default="openai",
-                        choices=["openai", "anthropic", "gemini", "mock"])
-    parser.add_argument("--model", type=str, help="Model name (optional)")
+Protocols = {
+    "CoT": SingleCoTProtocol,
+    "Socratic": SocraticDialogueProtocol,
+    "Congress": AmericanCongressProtocol,
+    "British": BritishParliamentaryProtocol,
+}
 
-    args = parser.parse_args()
 
-    # -------------------------------------------------------------
-    # Provider selection
-    # -------------------------------------------------------------
-    if args.provider == "openai":
-        provider = OpenAIProvider(model=args.model or "gpt-4o-mini")
-    elif args.provider == "anthropic":
-        provider = AnthropicProvider(model=args.model or "claude-3-haiku-20240307")
-    elif args.provider == "gemini":
-        provider = GeminiProvider(model=args.model or "gemini-2.5-flash-lite")
-    elif args.provider == "mock":
-        provider = MockProvider()
+# -------------------------------------------------------------
+# Helper: build a provider from a plain config dict
+# -------------------------------------------------------------
+def build_provider(provider_cfg):
+    name = provider_cfg["provider"]
+    model = provider_cfg.get("model")
+
+    if name == "openai":
+        return OpenAIProvider(model=model or "gpt-4o-mini")
+    elif name == "anthropic":
+        return AnthropicProvider(model=model or "claude-3-haiku-20240307")
+    elif name == "gemini":
+        return GeminiProvider(model=model or "gemini-2.5-flash-lite")
+    elif name == "mock":
+        return MockProvider()
     else:
         raise ValueError("Unknown provider")
 
-    # -------------------------------------------------------------
-    # 28 independent runs
-    # -------------------------------------------------------------
-    RUNS = 28
-    RESULTS_ROOT = "runs"
-    os.makedirs(RESULTS_ROOT, exist_ok=True)
 
-    Protocols = {
-        "CoT": SingleCoTProtocol,
-        "Socratic": SocraticDialogueProtocol,
-        "Congress": AmericanCongressProtocol,
-        "British": BritishParliamentaryProtocol,
-    }
+# -------------------------------------------------------------
+# Helper: one provider + runner per protocol worker thread
+# -------------------------------------------------------------
+_worker = threading.local()
 
-    for run_id in range(1, RUNS + 1):
-        run_dir = os.path.join(RESULTS_ROOT, f"run_{run_id:02d}")
-        os.makedirs(run_dir, exist_ok=True)
 
-        print(f"\n==============================")
-        print(f"   STARTING RUN {run_id:02d}")
-        print(f"==============================")
+def get_runner(provider_cfg):
+    # Built once per worker thread and reused across runs; no two
+    # concurrently executing experiments ever share a token counter.
+    runner = getattr(_worker, "runner", None)
+    if runner is None:
+        runner = ExperimentRunner(build_provider(provider_cfg))
+        _worker.runner = runner
 
-        run_summary = {
-            "run_id": run_id,
-            "timestamp": datetime.now().isoformat(),
-            "protocols": {}
-        }
+    runner.reset_between_runs()
+    return runner
+
+
+# -------------------------------------------------------------
+# One protocol experiment inside a run
+# -------------------------------------------------------------
+def run_protocol(run_id, run_dir, proto_name, proto_class, provider_cfg, item_concurrency=1):
+    runner = get_runner(provider_cfg)
 
-        # Reset usage for each run (important!)
-        provider.reset_usage()
+    print(f"\n--- [run {run_id:02d}] Running {proto_name} ---")
 
-        # Create a fresh runner
-        runner = ExperimentRunner(provider)
+    out_path = os.path.join(run_dir, f"{proto_name}.json")
 
-        # Run all 4 protocols
-        for proto_name, proto_class in Protocols.items():
+    meta = runner.run_experiment(
+        proto_class,
+        dataset_name="hotpot_qa",
+        limit=100,
+        start=0,
+        end=100,
+        output_file=out_path,
+        max_concurrency=item_concurrency
+    )
 
-            print(f"\n--- Running {proto_name} ---")
+    # Accuracy + token stats come straight back from the runner
+    return summarize_metadata(meta)
 
-            out_path = os.path.join(run_dir, f"{proto_name}.json")
 
-            runner.run_experiment(
-                proto_class,
-                dataset_name="hotpot_qa",
-                limit=100,
-                start=0,
-                end=100,
-                output_file=out_path
-            )
+# -------------------------------------------------------------
+# One full run: all 4 protocols + summary.json
+# -------------------------------------------------------------
+def run_single(run_id, provider_cfg, proto_executor, item_concurrency=1):
+    run_dir = os.path.join(RESULTS_ROOT, f"run_{run_id:02d}")
+    os.makedirs(run_dir, exist_ok=True)
+
+    print(f"\n==============================")
+    print(f"   STARTING RUN {run_id:02d}")
+    print(f"==============================")
+
+    run_summary = {
+        "run_id": run_id,
+        "timestamp": datetime.now().isoformat(),
+        "protocols": {}
+    }
+
+    # Run all 4 protocols concurrently; they share no state and each
+    # one is gated on LLM latency.
+    futures = {
+        proto_name: proto_executor.submit(
+            run_protocol, run_id, run_dir, proto_name, proto_class, provider_cfg,
+            item_concurrency
+        )
+        for proto_name, proto_class in Protocols.items()
+    }
 
-            # Read back accuracy + token stats
-            meta = load_metadata(out_path)
-            run_summary["protocols"][proto_name] = meta
+    # Keep summary keys in protocol order regardless of completion order
+    for proto_name, future in futures.items():
+        run_summary["protocols"][proto_name] = future.result()
 
-        # Save run summary
-        summary_path = os.path.join(run_dir, "summary.json")
+    # Save run summary
+    summary_path = os.path.join(run_dir, "summary.json")
+    if orjson is not None:
+        with open(summary_path, "wb") as f:
+            f.write(orjson.dumps(run_summary, option=orjson.OPT_INDENT_2))
+    else:
         with open(summary_path, "w") as f:
             json.dump(run_summary, f, indent=2)
 
-        print(f"\nSaved summary for run {run_id:02d} → {summary_path}")
+    return summary_path
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Multi-Agent Debate Experiment Runner")
+    parser.add_argument("--dataset", type=str, default="hotpot_qa",
+                        choices=["hotpot_qa", "cais/mmlu"], help="Dataset")
+    parser.add_argument("--provider", type=str, default="openai",
+                        choices=["openai", "anthropic", "gemini", "mock"])
+    parser.add_argument("--model", type=str, help="Model name (optional)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of runs to execute concurrently")
+    parser.add_argument("--item-concurrency", type=int, default=1,
+                        help="Number of dataset items in flight per protocol")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Log a line per processed item")
+
+    args = parser.parse_args()
+
+    # The runner logs run summaries at INFO and per-item progress at DEBUG
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+
+    # -------------------------------------------------------------
+    # Provider selection (built per protocol worker in get_runner)
+    # -------------------------------------------------------------
+    provider_cfg = {"provider": args.provider, "model": args.model}
+
+    # -------------------------------------------------------------
+    # 28 independent runs, dispatched across worker threads.
+    # The work is dominated by blocking network I/O, so threads
+    # overlap the LLM round trips without the cost of processes.
+    # -------------------------------------------------------------
+    os.makedirs(RESULTS_ROOT, exist_ok=True)
+
+    # Protocol experiments run on a separate, long-lived pool so each
+    # worker's provider and runner are reused from one run to the next.
+    with ThreadPoolExecutor(max_workers=args.workers * len(Protocols)) as proto_executor, \
+            ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(run_single, run_id, provider_cfg, proto_executor, args.item_concurrency): run_id
+            for run_id in range(1, RUNS + 1)
+        }
+        for future in as_completed(futures):
+            run_id = futures[future]
+            summary_path = future.result()
+            print(f"\nSaved summary for run {run_id:02d} → {summary_path}")
 
 
 if __name__ == "__main__":
@@ -1,29 +1,85 @@
-from typing import List, Dict, Optional
-from ..llm.base import LLMProvider
+from typing import List, Dict, Optional, Tuple, Type
+from ..llm.base import LLMProvider, Prompt, Schema, StructuredOutputError, flatten_prompt
 
 class DebaterAgent:
-    def __init__(self, name: str, provider: LLMProvider, system_prompt: str):
+    def __init__(self, name: str, provider: LLMProvider, system_prompt: str, stateful: bool = False):
         self.name = name
         self.provider = provider
         self.system_prompt = system_prompt
-        self.memory: List[Dict[str, str]] = []
+        # Prompts never include the history, so hearing the other side's turns
+        # (listen) only matters when a caller wants a full per-agent record.
+        # Protocols skip listen() calls unless this is set.
+        self.stateful = stateful
+        # Constant tail appended to every prompt this agent sends
+        self._suffix = f"\n\n(You are {name}. Respond accordingly.)"
+        # Conversation history as parallel role/content lists
+        self.roles: List[str] = []
+        self.contents: List[str] = []
 
-    def speak(self, context: str) -> str:
+    @property
+    def memory(self) -> List[Dict[str, str]]:
+        """List-of-dicts view of the history, kept for backward compatibility."""
+        return [{"role": role, "content": content} for role, content in zip(self.roles, self.contents)]
+
+    def _remember(self, role: str, content: str):
+        self.roles.append(role)
+        self.contents.append(content)
+
+    def build_request(self, context: Prompt) -> Tuple[Prompt, Optional[str]]:
+        """
+        Returns the (prompt, system_prompt) pair speak() would send for this context.
+        Block prompts stay blocks (the suffix becomes the last block) so cache
+        breakpoints survive; flattened, both forms give the same text.
+        """
+        if isinstance(context, str):
+            return context + self._suffix, self.system_prompt
+        return list(context) + [{"type": "text", "text": self._suffix}], self.system_prompt
+
+    def record_exchange(self, context: Prompt, response: str):
+        """Stores a prompt/response pair produced outside speak(), e.g. by a batch call."""
+        self._remember("user", flatten_prompt(context))
+        self._remember("assistant", response)
+
+    def respond(self, context: Prompt) -> str:
+        """
+        Generates a response without touching memory. Safe to call from worker
+        threads; the caller records the exchange with record_exchange().
+        """
+        full_prompt, system_prompt = self.build_request(context)
+        return self.provider.generate(full_prompt, system_prompt=system_prompt)
+
+    def speak(self, context: Prompt) -> str:
         """Generates a response based on the provided context."""
         # In a real debate, we might append the context to memory or just use it as the prompt
         # For now, we'll treat 'context' as the immediate prompt, but we could also build a history.
-        full_prompt = f"{context}\n\n(You are {self.name}. Respond accordingly.)"
-        response = self.provider.generate(full_prompt, system_prompt=self.system_prompt)
-        self.memory.append({"role": "user", "content": context})
-        self.memory.append({"role": "assistant", "content": response})
+        response = self.respond(context)
+        self.record_exchange(context, response)
         return response
 
-    def speak_stream(self, context: str):
+    def respond_structured(self, context: Prompt, schema: Type[Schema]) -> Schema:
+        """respond(), but parsed into the pydantic model `schema`. Leaves memory untouched."""
+        full_prompt, system_prompt = self.build_request(context)
+        return self.provider.generate_structured(full_prompt, schema, system_prompt=system_prompt)
+
+    def speak_structured(self, context: Prompt, schema: Type[Schema]) -> Schema:
+        """
+        speak(), but parsed into the pydantic model `schema`; memory stores its
+        JSON. On StructuredOutputError, the raw reply is recorded before re-raising.
+        """
+        try:
+            result = self.respond_structured(context, schema)
+        except StructuredOutputError as e:
+            self.record_exchange(context, e.text)
+            raise
+        self.record_exchange(context, result.model_dump_json())
+        return result
+
+    def speak_stream(self, context: Prompt):
         """Generates a streaming response."""
-        full_prompt = f"{context}\n\n(You are {self.name}. Respond accordingly.)"
+        full_prompt, system_prompt = self.build_request(context)
         # We don't update memory here immediately, or we handle it after consumption
-        return self.provider.generate_stream(full_prompt, system_prompt=self.system_prompt)
+        return self.provider.generate_stream(full_prompt, system_prompt=system_prompt)
 
     def listen(self, content: str):
         """Updates the agent's memory with what others have said."""
-        self.memory.append({"role": "user", "content": content})
+        self._remember("user", content)
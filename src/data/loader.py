@@ -1,9 +1,70 @@
+import functools
+import threading
 from typing import List, Dict, Any, Optional
 try:
     from datasets import load_dataset
 except ImportError:
     load_dataset = None
 
+# Parsed datasets are shared by every DataLoader in the process; the lock keeps
+# concurrent experiments from materializing the same split more than once.
+_load_lock = threading.Lock()
+
+
+def _head(ds, limit: Optional[int]):
+    """Selects only the first `limit` rows (Arrow-side) so the rest are never materialized."""
+    if limit:
+        return ds.select(range(min(limit, len(ds))))
+    return ds
+
+
+@functools.lru_cache(maxsize=None)
+def _load_rows(dataset_name: str, split: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    if dataset_name == "hotpot_qa":
+        ds = _head(load_dataset("hotpot_qa", "distractor", split=split), limit)
+        data = []
+        for item in ds:
+            ctx_chunks = []
+            # HotpotQA context is {'title': [str], 'sentences': [[str]]}
+            titles = item["context"]["title"]
+            sentences_list = item["context"]["sentences"]
+            
+            for title, sents in zip(titles, sentences_list):
+                ctx_chunks.append(f"Title: {title}\n" + " ".join(sents))
+            context_text = "\n\n".join(ctx_chunks)
+
+            data.append({
+                "id": item["id"],
+                "question": item["question"],
+                "answer": item["answer"],
+                "context": context_text,
+            })
+
+            # data.append({
+            #     "id": item["id"],
+            #     "question": item["question"],
+            #     "answer": item["answer"],
+            #     "context": item["context"] # List of [title, sentences]
+            # })
+    elif dataset_name == "cais/mmlu":
+        # MMLU has many subsets, defaulting to 'abstract_algebra' for example, or all?
+        # For simplicity, let's pick one or make it configurable. 
+        # User might want to pass specific config.
+        ds = _head(load_dataset("cais/mmlu", "all", split=split), limit)
+        data = []
+        for item in ds:
+            data.append({
+                "id": str(item.get("id", "")), # MMLU might not have ID
+                "question": item["question"],
+                "choices": item["choices"],
+                "answer": item["answer"] # index of correct choice
+            })
+    else:
+        raise ValueError(f"Dataset {dataset_name} not supported.")
+
+    return data
+
+
 class DataLoader:
     def __init__(self, dataset_name: str, split: str = "validation", limit: Optional[int] = None):
         if load_dataset is None:
@@ -13,48 +74,7 @@ class DataLoader:
         self.limit = limit
 
     def load(self) -> List[Dict[str, Any]]:
-        if self.dataset_name == "hotpot_qa":
-            ds = load_dataset("hotpot_qa", "distractor", split=self.split)
-            data = []
-            for item in ds:
-                ctx_chunks = []
-                # HotpotQA context is {'title': [str], 'sentences': [[str]]}
-                titles = item["context"]["title"]
-                sentences_list = item["context"]["sentences"]
-                
-                for title, sents in zip(titles, sentences_list):
-                    ctx_chunks.append(f"Title: {title}\n" + " ".join(sents))
-                context_text = "\n\n".join(ctx_chunks)
-
-                data.append({
-                    "id": item["id"],
-                    "question": item["question"],
-                    "answer": item["answer"],
-                    "context": context_text,
-                })
-
-                # data.append({
-                #     "id": item["id"],
-                #     "question": item["question"],
-                #     "answer": item["answer"],
-                #     "context": item["context"] # List of [title, sentences]
-                # })
-        elif self.dataset_name == "cais/mmlu":
-            # MMLU has many subsets, defaulting to 'abstract_algebra' for example, or all?
-            # For simplicity, let's pick one or make it configurable. 
-            # User might want to pass specific config.
-            ds = load_dataset("cais/mmlu", "all", split=self.split)
-            data = []
-            for item in ds:
-                data.append({
-                    "id": str(item.get("id", "")), # MMLU might not have ID
-                    "question": item["question"],
-                    "choices": item["choices"],
-                    "answer": item["answer"] # index of correct choice
-                })
-        else:
-            raise ValueError(f"Dataset {self.dataset_name} not supported.")
-
-        if self.limit:
-            return data[:self.limit]
-        return data
+        with _load_lock:
+            data = _load_rows(self.dataset_name, self.split, self.limit)
+
+        return list(data)
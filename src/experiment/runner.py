@@ -1,20 +1,81 @@
+import functools
+import hashlib
 import json
+import logging
 import os
+import re
 import string
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Type
-from ..llm.base import LLMProvider
+from typing import Dict, List, Tuple, Type
+from ..llm.base import BatchRequestError, LLMProvider
 from ..agents.agent import DebaterAgent
-from ..protocols.base import DebateProtocol
+from ..protocols.base import SERIAL_BATCHER_ERROR, DebateProtocol
 from ..data.loader import DataLoader
 
+logger = logging.getLogger(__name__)
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_DECODE_ERRORS = (json.JSONDecodeError,) if ijson is None else (json.JSONDecodeError, ijson.JSONError)
+
+# (name, system prompt) of each agent a protocol is run with
+PROTOCOL_AGENT_SPECS: Dict[str, List[Tuple[str, str]]] = {
+    "SingleCoTProtocol": [
+        ("Solver", "You are a helpful assistant."),
+    ],
+    "SocraticDialogueProtocol": [
+        ("Student", "You are a student trying to answer questions."),
+        ("Socrates", "You are Socrates. Ask probing questions."),
+    ],
+    "AmericanCongressProtocol": [
+        ("Affirmative", "You are the Affirmative side."),
+        ("Negative", "You are the Negative side."),
+    ],
+    "BritishParliamentaryProtocol": [
+        ("Government", "You are the Government."),
+        ("Opposition", "You are the Opposition."),
+    ],
+}
+
+# Generic roles for protocols without an entry above
+FALLBACK_ROLES = ["Agent A", "Agent B", "Agent C"]
+
+# Splits a row-marshaled response into its numbered answers
+_ANSWER_RE = re.compile(r"Answer (\d+):")
+
+
+def _normalize(s: str) -> str:
+    return s.lower().strip(string.punctuation).strip()
+
+
+# Ground truths repeat across protocols and runs, predictions almost never do
+_normalize_ground_truth = functools.lru_cache(maxsize=4096)(_normalize)
+
+
+def _question_key(question) -> bytes:
+    """64-bit fingerprint of a question, used as the resume dedupe key."""
+    return hashlib.blake2b(str(question or "").encode("utf-8"), digest_size=8).digest()
+
 class ExperimentRunner:
     def __init__(self, provider: LLMProvider, output_dir: str = "results"):
         self.provider = provider
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
 
+    def reset_between_runs(self):
+        """Clears per-run state so the same runner can be reused for the next run."""
+        self.provider.reset_usage()
+
     def run_experiment(self, 
                        protocol_class: Type[DebateProtocol], 
                        dataset_name: str, 
@@ -24,8 +85,143 @@ class ExperimentRunner:
                        end: int = None,                   
                        output_file: str = None,
                        delay: float = 0.0,
+                       max_concurrency: int = 1,
+                       row_marshal_batch: int = 1,
                        **protocol_kwargs):
         
+        if protocol_kwargs.get("final_batcher") is not None and max_concurrency <= 1:
+            raise ValueError(SERIAL_BATCHER_ERROR)
+
+        data, end = self._load_items(dataset_name, limit, start, end)
+        filepath, results, correct_count, total_count, processed_ids = self._prepare_output(
+            protocol_class, dataset_name, start, end, output_file
+        )
+        
+        logger.info(f"Starting experiment with {protocol_class.__name__} on {dataset_name}...")
+        logger.info(f"Output will be saved to: {filepath}")
+        
+        pending = []
+        for item in data:
+            question = item["question"]
+            
+            if _question_key(question) in processed_ids:
+                logger.debug(f"Skipping already processed question: {question[:30]}...")
+                continue
+
+            pending.append(item)
+
+        # Items are independent and latency-bound, so up to max_concurrency of
+        # them are in flight at once. Results are recorded on this thread only.
+        # Protocols are stateless (see DebateProtocol), so one instance
+        # serves every item, including items running concurrently
+        protocol = protocol_class()
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        # Append only after the earlier results were read back (or seeded) into it
+        checkpoint = self._open_checkpoint(filepath, append=bool(results))
+        try:
+            if row_marshal_batch > 1 and protocol_class.supports_batch:
+                # Stateless single-turn protocols: several questions per request
+                futures = [
+                    executor.submit(self._run_marshaled, protocol, chunk, prompt, delay)
+                    for chunk, prompt in self._batch_questions(pending, row_marshal_batch)
+                ]
+            else:
+                # The provider's usage counter is shared, so a before/after delta
+                # is only this item's own usage when items run one at a time
+                track_usage = max_concurrency == 1
+                futures = [
+                    executor.submit(self._run_item, protocol, item, num_agents, delay, protocol_kwargs, track_usage)
+                    for item in pending
+                ]
+            for future in as_completed(futures):
+                for result, is_correct in future.result():
+                    if is_correct is not None:
+                        if is_correct:
+                            correct_count += 1
+                        total_count += 1
+                    results.append(result)
+                    checkpoint.write(json.dumps(result, separators=(",", ":")) + "\n")
+
+                # Checkpoint incrementally: one flushed append per finished request
+                checkpoint.flush()
+        except BaseException:
+            # Fail fast instead of draining the queued items
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            checkpoint.close()
+        executor.shutdown()
+
+        # Items finish out of order; the saved results follow the dataset
+        self._sort_results(results, data)
+
+        # Final save
+        metadata = self._save_results(filepath, protocol_class.__name__, dataset_name, results, correct_count, total_count)
+        self._report(metadata, filepath)
+        return metadata
+
+    def run_experiment_batch(self,
+                             protocol_class: Type[DebateProtocol],
+                             dataset_name: str,
+                             num_agents: int = 1,
+                             limit: int = 3,
+                             start: int = 0,
+                             end: int = None,
+                             output_file: str = None):
+        """
+        Offline variant of run_experiment for single-turn protocols
+        (supports_batch = True): every pending item's prompt is sent in one
+        provider.batch_generate call, which uses the provider's batch API
+        where one exists. Results are only written once the batch returns,
+        and per-question token usage is not available. A request that failed
+        inside the batch is recorded as an error result, as in run_experiment.
+        """
+        if not protocol_class.supports_batch:
+            raise ValueError(f"{protocol_class.__name__} does not support batch execution.")
+
+        data, end = self._load_items(dataset_name, limit, start, end)
+        filepath, results, correct_count, total_count, processed_ids = self._prepare_output(
+            protocol_class, dataset_name, start, end, output_file
+        )
+
+        pending = [item for item in data if _question_key(item["question"]) not in processed_ids]
+        logger.info(f"Submitting {len(pending)} {protocol_class.__name__} prompts on {dataset_name} as one batch...")
+
+        protocol = protocol_class()
+        agents, contexts, requests = [], [], []
+        for item in pending:
+            agent = self._build_agents(protocol_class, num_agents)[0]
+            context = protocol.build_prompt(item["question"], item.get("context", ""))
+            agents.append(agent)
+            contexts.append(context)
+            requests.append(agent.build_request(context))
+
+        responses = self.provider.batch_generate(requests) if requests else []
+
+        with self._open_checkpoint(filepath, append=bool(results)) as checkpoint:
+            for item, agent, context, response in zip(pending, agents, contexts, responses):
+                if isinstance(response, BatchRequestError):
+                    # Recorded like an errored item in run_experiment: not scored
+                    logger.warning(f"Error processing item: {response}")
+                    result = {"error": str(response), "question": item["question"]}
+                else:
+                    agent.record_exchange(context, response)
+                    result = protocol.build_result(item["question"], agent, response)
+                    result["ground_truth"] = item["answer"]
+                    is_correct = self._evaluate_correctness(result.get("final_answer", ""), item["answer"])
+                    result["is_correct"] = is_correct
+                    if is_correct:
+                        correct_count += 1
+                    total_count += 1
+                results.append(result)
+                checkpoint.write(json.dumps(result, separators=(",", ":")) + "\n")
+
+        self._sort_results(results, data)
+        metadata = self._save_results(filepath, protocol_class.__name__, dataset_name, results, correct_count, total_count)
+        self._report(metadata, filepath)
+        return metadata
+
+    def _load_items(self, dataset_name: str, limit: int, start: int, end: int):
         loader = DataLoader(dataset_name, limit=limit)
         data = loader.load()
 
@@ -34,8 +230,15 @@ class ExperimentRunner:
             end = len(data)
         data = data[start:end]
 
-        print(f"Loaded {len(data)} examples (from index {start} to {end})")
-        
+        logger.info(f"Loaded {len(data)} examples (from index {start} to {end})")
+        return data, end
+
+    def _prepare_output(self, protocol_class: Type[DebateProtocol], dataset_name: str, start: int, end: int, output_file: str = None):
+        """
+        Resolves the output filepath and loads any earlier results from it,
+        preferring the JSONL checkpoint next to it over the consolidated JSON.
+        Returns (filepath, results, correct_count, total_count, processed_ids).
+        """
         results = []
         correct_count = 0
         total_count = 0
@@ -44,87 +247,159 @@ class ExperimentRunner:
         # Determine output filepath
         if output_file:
             filepath = output_file
-            # If file exists, load it to resume
-            if os.path.exists(filepath):
-                print(f"Resuming from {filepath}...")
+            checkpoint_path = filepath + ".jsonl"
+            # If a checkpoint exists, it holds every finished result
+            if os.path.exists(checkpoint_path):
+                logger.info(f"Resuming from {checkpoint_path}...")
+                results = self._read_checkpoint(checkpoint_path)
+                for r in results:
+                    if "is_correct" in r:
+                        if r["is_correct"]:
+                            correct_count += 1
+                        total_count += 1
+                processed_ids = {_question_key(r.get("question")) for r in results}
+                logger.info(f"Loaded {len(results)} existing results.")
+            # Otherwise fall back to a consolidated JSON file from an older run
+            elif os.path.exists(filepath):
+                logger.info(f"Resuming from {filepath}...")
                 try:
-                    with open(filepath, "r") as f:
-                        existing_data = json.load(f)
-                        # Handle both old format (list) and new format (dict with metadata)
-                        if isinstance(existing_data, list):
-                            results = existing_data
-                        elif isinstance(existing_data, dict) and "results" in existing_data:
-                            results = existing_data["results"]
-                            # Restore counts if available, or recalculate
-                            if "metadata" in existing_data:
-                                correct_count = existing_data["metadata"].get("correct_count", 0)
-                                total_count = existing_data["metadata"].get("total_count", 0)
-                        
-                        # Populate processed_ids. Assuming 'question' is unique enough for now if ID is missing
+                    results, correct_count, total_count = self._read_legacy_results(filepath)
+
+                    # Populate processed_ids. Assuming 'question' is unique enough for now if ID is missing.
+                    # HotpotQA has IDs, but our result might not have saved it explicitly if we didn't pass it through.
+                    # Let's use a fingerprint of the question text as dedupe key for now.
+                    processed_ids = {_question_key(r.get("question")) for r in results}
+
+                    # Seed the checkpoint so new results are appended after these
+                    with self._open_checkpoint(filepath) as checkpoint:
                         for r in results:
-                            # Try to find a unique identifier. 
-                            # HotpotQA has IDs, but our result might not have saved it explicitly if we didn't pass it through.
-                            # Let's use question text as dedupe key for now.
-                            processed_ids.add(r.get("question"))
+                            checkpoint.write(json.dumps(r, separators=(",", ":")) + "\n")
                             
-                    print(f"Loaded {len(results)} existing results.")
-                except json.JSONDecodeError:
-                    print(f"Warning: Could not decode {filepath}. Starting fresh.")
+                    logger.info(f"Loaded {len(results)} existing results.")
+                except _DECODE_ERRORS:
+                    results, correct_count, total_count = [], 0, 0
+                    logger.warning(f"Could not decode {filepath}. Starting fresh.")
         else:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{protocol_class.__name__}_{dataset_name}_{start}_{end-1}.json"
             filepath = os.path.join(self.output_dir, filename)
-        
-        print(f"Starting experiment with {protocol_class.__name__} on {dataset_name}...")
-        print(f"Output will be saved to: {filepath}")
-        
-        for item in data:
-            question = item["question"]
-            
-            if question in processed_ids:
-                print(f"Skipping already processed question: {question[:30]}...")
-                continue
 
-            print(f"Processing: {question[:50]}...")
+        return filepath, results, correct_count, total_count, processed_ids
+
+    def _read_legacy_results(self, filepath):
+        """
+        Loads (results, correct_count, total_count) from a consolidated JSON file.
+        With ijson installed the file is streamed one record at a time instead
+        of being parsed as a single document.
+        """
+        correct_count = 0
+        total_count = 0
+
+        if ijson is None:
+            with open(filepath, "rb") as f:
+                raw = f.read()
+            existing_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            # Handle both old format (list) and new format (dict with metadata)
+            if isinstance(existing_data, list):
+                return existing_data, correct_count, total_count
+            results = []
+            if isinstance(existing_data, dict) and "results" in existing_data:
+                results = existing_data["results"]
+                # Restore counts if available, or recalculate
+                if "metadata" in existing_data:
+                    correct_count = existing_data["metadata"].get("correct_count", 0)
+                    total_count = existing_data["metadata"].get("total_count", 0)
+            return results, correct_count, total_count
+
+        with open(filepath, "rb") as f:
+            # Old format is a bare list, new format a dict with metadata
+            is_list = f.read(64).lstrip().startswith(b"[")
+            f.seek(0)
+            results = list(ijson.items(f, "item" if is_list else "results.item", use_float=True))
+            if not is_list:
+                f.seek(0)
+                for key, value in ijson.kvitems(f, "metadata", use_float=True):
+                    if key == "correct_count":
+                        correct_count = value
+                    elif key == "total_count":
+                        total_count = value
+        return results, correct_count, total_count
+
+    def _open_checkpoint(self, filepath, append: bool = False):
+        """
+        Opens the JSONL checkpoint for filepath with a 64 KB write buffer.
+        Unless append is set (the checkpoint was just read back for a resume),
+        it is truncated so a previous run's rows never leak into this one.
+        """
+        return open(filepath + ".jsonl", "a" if append else "w", buffering=64 * 1024, encoding="utf-8")
+
+    def _read_checkpoint(self, checkpoint_path):
+        """
+        Reads one result per line. A crash can leave a partial last line;
+        it is cut off so later appends start on a clean line.
+        """
+        results = []
+        good_bytes = 0
+        with open(checkpoint_path, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    results.append(orjson.loads(line) if orjson is not None else json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                good_bytes += len(line)
+            f.truncate(good_bytes)
+        return results
+
+    def _sort_results(self, results, data):
+        """Puts results (resumed ones included) in the order of their items in data."""
+        position = {_question_key(item["question"]): i for i, item in enumerate(data)}
+        results.sort(key=lambda r: position.get(_question_key(r.get("question")), len(position)))
+
+    def _report(self, metadata, filepath):
+        accuracy = metadata["accuracy"]
+        correct_count = metadata["correct_count"]
+        total_count = metadata["total_count"]
+        # token summary
+        usage = self.provider.get_usage()
+        prompt_tok = usage["prompt_tokens"]
+        completion_tok = usage["completion_tokens"]
+        total_tok = usage["total_tokens"]
+
+        logger.info(
+            f"Experiment finished. Accuracy: {accuracy:.2f} ({correct_count}/{total_count}).\n"
+            f"Tokens used → prompt={prompt_tok}, completion={completion_tok}, total={total_tok}.\n"
+            f"Results saved to {filepath}"
+        )
+        # print(f"Experiment finished. Accuracy: {accuracy:.2f} ({correct_count}/{total_count}). Results saved to {filepath}")
+
+    def _run_item(self, protocol: DebateProtocol, item, num_agents: int, delay: float, protocol_kwargs,
+                  track_usage: bool = True):
+        """
+        Runs the protocol on a single dataset item.
+        Returns [(result, is_correct)]; is_correct is None when the item errored.
+        An errored result carries its token_usage only when track_usage is set,
+        i.e. when no other item is using the provider at the same time.
+        """
+        question = item["question"]
+
+        logger.debug(f"Processing: {question[:50]}...")
+        
+        agents = self._build_agents(type(protocol), num_agents)
+        # --- snapshot provider usage BEFORE answering this question ---
+        before_usage = self.provider.get_usage() if track_usage else None
+        try:
+            context = item.get("context", "")
+            result = protocol.run(question, agents, context=context, **protocol_kwargs)
+            result["ground_truth"] = item["answer"]
             
-            # Initialize agents
-            agents = []
-            roles = ["Agent A", "Agent B", "Agent C"] # Generic roles
-            if protocol_class.__name__ == "SingleCoTProtocol":
-                agents.append(DebaterAgent("Solver", self.provider, "You are a helpful assistant."))
-            elif protocol_class.__name__ == "SocraticDialogueProtocol":
-                agents.append(DebaterAgent("Student", self.provider, "You are a student trying to answer questions."))
-                agents.append(DebaterAgent("Socrates", self.provider, "You are Socrates. Ask probing questions."))
-            elif protocol_class.__name__ == "AmericanCongressProtocol":
-                agents.append(DebaterAgent("Affirmative", self.provider, "You are the Affirmative side."))
-                agents.append(DebaterAgent("Negative", self.provider, "You are the Negative side."))
-            elif protocol_class.__name__ == "BritishParliamentaryProtocol":
-                agents.append(DebaterAgent("Government", self.provider, "You are the Government."))
-                agents.append(DebaterAgent("Opposition", self.provider, "You are the Opposition."))
-            else:
-                # Fallback generic agents
-                for i in range(num_agents):
-                    agents.append(DebaterAgent(roles[i], self.provider, f"You are {roles[i]}."))
-
-            protocol = protocol_class()
-            try:
-                context = item.get("context", "")
-                # --- snapshot provider usage BEFORE answering this question ---
-                before_usage = self.provider.get_usage()
-                result = protocol.run(question, agents, context=context, **protocol_kwargs)
-                result["ground_truth"] = item["answer"]
-                
-                # Evaluate correctness
-                is_correct = self._evaluate_correctness(result.get("final_answer", ""), item["answer"])
-                result["is_correct"] = is_correct
-                if is_correct:
-                    correct_count += 1
-                total_count += 1
-                
-                results.append(result)
-            except Exception as e:
-                print(f"Error processing item: {e}")
-                results.append({"error": str(e), "question": question})
+            # Evaluate correctness
+            is_correct = self._evaluate_correctness(result.get("final_answer", ""), item["answer"])
+            result["is_correct"] = is_correct
+        except Exception as e:
+            logger.warning(f"Error processing item: {e}")
+            error_result = {"error": str(e), "question": question}
+            if track_usage:
                 # --- snapshot provider usage AFTER ---
                 after_usage = self.provider.get_usage()
 
@@ -134,36 +409,75 @@ class ExperimentRunner:
                 delta_total = delta_prompt + delta_completion
 
                 # store per-question token usage
-                result["token_usage"] = {
+                error_result["token_usage"] = {
                     "prompt_tokens": delta_prompt,
                     "completion_tokens": delta_completion,
                     "total_tokens": delta_total
                 }
+            result, is_correct = error_result, None
 
-            # Save incrementally
-            self._save_results(filepath, protocol_class.__name__, dataset_name, results, correct_count, total_count)
-            
-            if delay > 0:
-                print(f"Sleeping/waiting for API rate limit for {delay} seconds...")
-                time.sleep(delay)
+        if delay > 0:
+            logger.debug(f"Sleeping/waiting for API rate limit for {delay} seconds...")
+            time.sleep(delay)
 
+        return [(result, is_correct)]
 
-        # Final save
-        self._save_results(filepath, protocol_class.__name__, dataset_name, results, correct_count, total_count)
-        
-        accuracy = correct_count / total_count if total_count > 0 else 0.0
-        # token summary
-        usage = self.provider.get_usage()
-        prompt_tok = usage["prompt_tokens"]
-        completion_tok = usage["completion_tokens"]
-        total_tok = usage["total_tokens"]
+    def _batch_questions(self, items, batch_size: int = 8):
+        """
+        Groups items into chunks of batch_size and renders each chunk as one
+        numbered prompt. Yields (chunk, prompt) pairs.
+        """
+        for i in range(0, len(items), batch_size):
+            chunk = items[i:i + batch_size]
+            parts = [
+                "You are answering questions from a QA benchmark.\n"
+                "Answer each question below using its context. For question N, write "
+                "exactly one line in this format:\n"
+                "Answer N: <one short answer only (for example: 'yes', 'no', a name, or a short noun phrase)>\n"
+                "Do NOT include any other text, and do NOT mention using tools or browsing."
+            ]
+            for n, item in enumerate(chunk, 1):
+                parts.append(f"Q{n}:\nContext:\n{item.get('context', '')}\nQuestion: {item['question']}")
+            yield chunk, "\n\n".join(parts)
 
-        print(
-            f"Experiment finished. Accuracy: {accuracy:.2f} ({correct_count}/{total_count}).\n"
-            f"Tokens used → prompt={prompt_tok}, completion={completion_tok}, total={total_tok}.\n"
-            f"Results saved to {filepath}"
-        )
-        # print(f"Experiment finished. Accuracy: {accuracy:.2f} ({correct_count}/{total_count}). Results saved to {filepath}")
+    def _run_marshaled(self, protocol: DebateProtocol, chunk, prompt: str, delay: float):
+        """
+        Answers a chunk of items with a single request.
+        Returns one (result, is_correct) pair per item, in chunk order.
+        """
+        logger.debug(f"Processing {len(chunk)} questions in one request...")
+
+        agent = self._build_agents(type(protocol), 1)[0]
+        try:
+            response = agent.speak(prompt)
+        except Exception as e:
+            logger.warning(f"Error processing batch: {e}")
+            return [({"error": str(e), "question": item["question"]}, None) for item in chunk]
+
+        # ["preamble", "1", "answer 1", "2", "answer 2", ...]
+        pieces = _ANSWER_RE.split(response)
+        answers = {int(n): text.strip() for n, text in zip(pieces[1::2], pieces[2::2])}
+
+        outcomes = []
+        for n, item in enumerate(chunk, 1):
+            result = protocol.build_result(item["question"], agent, answers.get(n, ""))
+            result["ground_truth"] = item["answer"]
+            is_correct = self._evaluate_correctness(result.get("final_answer", ""), item["answer"])
+            result["is_correct"] = is_correct
+            outcomes.append((result, is_correct))
+
+        if delay > 0:
+            logger.debug(f"Sleeping/waiting for API rate limit for {delay} seconds...")
+            time.sleep(delay)
+
+        return outcomes
+
+    def _build_agents(self, protocol_class: Type[DebateProtocol], num_agents: int) -> List[DebaterAgent]:
+        # Fresh agents every item (they carry memory); only the specs are shared
+        specs = PROTOCOL_AGENT_SPECS.get(protocol_class.__name__)
+        if specs is None:
+            specs = [(role, f"You are {role}.") for role in FALLBACK_ROLES[:num_agents]]
+        return [DebaterAgent(name, self.provider, system_prompt) for name, system_prompt in specs]
 
     def _save_results(self, filepath, protocol_name, dataset_name, results, correct_count, total_count):
         accuracy = correct_count / total_count if total_count > 0 else 0.0
@@ -181,19 +495,20 @@ class ExperimentRunner:
             },
             "results": results
         }
-        with open(filepath, "w") as f:
-            json.dump(output_data, f, indent=2)
+        if orjson is not None:
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, "w") as f:
+                json.dump(output_data, f, indent=2)
+        return output_data["metadata"]
 
     def _evaluate_correctness(self, prediction: str, ground_truth: str) -> bool:
         """
         Evaluates if the prediction is correct based on the ground truth.
         Uses a simple inclusion check after normalization.
         """
-        def normalize(s: str) -> str:
-            return s.lower().strip(string.punctuation).strip()
-            
-        pred_norm = normalize(str(prediction))
-        gt_norm = normalize(str(ground_truth))
+        gt_norm = _normalize_ground_truth(str(ground_truth))
         
         # For MMLU (multiple choice), ground_truth is an index (int) or letter
         # But our loader might return it as is.
@@ -203,4 +518,4 @@ class ExperimentRunner:
         if not gt_norm:
             return False
             
-        return gt_norm in pred_norm
+        return gt_norm in _normalize(str(prediction))
@@ -1,5 +1,35 @@
+import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Generator, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple, Type, TypeVar, Union
+
+# A prompt is either plain text or a list of Anthropic-style text blocks,
+# {"type": "text", "text": ..., "cache_control": {"type": "ephemeral"}},
+# where cache_control marks the end of a stable, cacheable prefix.
+Prompt = Union[str, List[Dict[str, Any]]]
+
+# A pydantic model class describing a structured response
+Schema = TypeVar("Schema")
+
+
+class StructuredOutputError(ValueError):
+    """A reply that could not be parsed into the requested schema; `text` is the raw reply."""
+
+    def __init__(self, message: str, text: str = ""):
+        super().__init__(message)
+        self.text = text
+
+
+class BatchRequestError(RuntimeError):
+    """Stands in for the response of one request that failed inside a finished batch."""
+
+
+def flatten_prompt(prompt: Prompt) -> str:
+    """Joins text blocks back into the plain string block-unaware providers take."""
+    if isinstance(prompt, str):
+        return prompt
+    return "".join(block["text"] for block in prompt)
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers with token tracking."""
@@ -8,29 +38,67 @@ class LLMProvider(ABC):
         # Global cumulative usage for this provider
         self.prompt_tokens = 0
         self.completion_tokens = 0
+        # Items may run concurrently against one provider
+        self._usage_lock = threading.Lock()
 
     @abstractmethod
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(self, prompt: Prompt, system_prompt: Optional[str] = None) -> str:
         """Generates a complete response for the given prompt."""
         pass
 
     @abstractmethod
-    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def generate_stream(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
         """Generates a streaming response for the given prompt."""
         pass
 
+    def batch_generate(self, prompts: List[Tuple[Prompt, Optional[str]]]) -> List[Union[str, BatchRequestError]]:
+        """
+        Generates one response per (prompt, system_prompt) pair, in order.
+        Providers with a native batch endpoint override this; there, a request
+        that failed inside the batch gets a BatchRequestError in its slot
+        instead of a response. The default simply calls generate() for each
+        prompt.
+        """
+        return [self.generate(prompt, system_prompt=system_prompt) for prompt, system_prompt in prompts]
+
+    def generate_structured(self, prompt: Prompt, schema: Type[Schema], system_prompt: Optional[str] = None) -> Schema:
+        """
+        Generates a response parsed into the pydantic model `schema`.
+        Providers with native structured output override this; the default
+        asks for a JSON object matching the schema and validates the reply
+        (raising StructuredOutputError if it doesn't match).
+        """
+        instruction = (
+            "\n\nRespond with ONLY a JSON object matching this JSON schema, and no other text:\n"
+            + json.dumps(schema.model_json_schema())
+        )
+        if isinstance(prompt, str):
+            prompt = prompt + instruction
+        else:
+            prompt = list(prompt) + [{"type": "text", "text": instruction}]
+        text = self.generate(prompt, system_prompt=system_prompt)
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            # pydantic.ValidationError (bad JSON or fields) is a ValueError
+            return schema.model_validate_json(text[start:end + 1] if 0 <= start < end else text)
+        except ValueError as e:
+            raise StructuredOutputError(f"Reply does not match {schema.__name__}: {e}", text) from e
+
     # --- Token tracking helpers ---
     def add_usage(self, prompt_tokens: int = 0, completion_tokens: int = 0):
-        self.prompt_tokens += prompt_tokens
-        self.completion_tokens += completion_tokens
+        with self._usage_lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
 
     def get_usage(self):
-        return {
-            "prompt_tokens": self.prompt_tokens,
-            "completion_tokens": self.completion_tokens,
-            "total_tokens": self.prompt_tokens + self.completion_tokens,
-        }
+        with self._usage_lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+            }
 
     def reset_usage(self):
-        self.prompt_tokens = 0
-        self.completion_tokens = 0
+        with self._usage_lock:
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
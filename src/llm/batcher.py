@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from .base import BatchRequestError, LLMProvider, Prompt
+
+
+class FinalAnswerBatcher:
+    """
+    Collects prompts from concurrently running debates and sends them to
+    provider.batch_generate together, so providers with a batch API answer
+    them at the batch discount. submit() returns a Future; a batch is sent
+    once max_batch prompts are waiting or the oldest has waited max_wait
+    seconds.
+    """
+
+    def __init__(self, provider: LLMProvider, max_batch: int = 32, max_wait: float = 2.0):
+        self.provider = provider
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Prompt, Optional[str], Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def submit(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Future:
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((prompt, system_prompt, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        # The submitter that fills a batch sends it; it would block on its
+        # own future anyway
+        if batch:
+            self._dispatch(batch)
+        return future
+
+    def flush(self):
+        """Sends whatever is waiting now."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _take(self) -> List[Tuple[Prompt, Optional[str], Future]]:
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _dispatch(self, batch: List[Tuple[Prompt, Optional[str], Future]]):
+        try:
+            responses = self.provider.batch_generate([(prompt, system_prompt) for prompt, system_prompt, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        if len(responses) != len(batch):
+            # zip() would leave the extra futures unresolved and their submitters blocked
+            error = RuntimeError(f"batch_generate returned {len(responses)} responses for {len(batch)} prompts")
+            for _, _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, _, future), response in zip(batch, responses):
+            if isinstance(response, BatchRequestError):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
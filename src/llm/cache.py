@@ -0,0 +1,62 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from .base import LLMProvider, Prompt, flatten_prompt
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "responses.sqlite")
+
+
+def provider_model_id(provider: LLMProvider) -> str:
+    """Identifies the provider and model that produced a response."""
+    # GeminiProvider keeps the model name apart from its model object
+    model = getattr(provider, "model_name", None) or getattr(provider, "model", None)
+    return f"{type(provider).__name__}:{model}"
+
+
+class ResponseCache:
+    """
+    Persistent prompt -> response cache in a single SQLite table, keyed on a
+    blake2b digest of (model, system prompt, prompt text). Safe to share
+    between threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_id: str, prompt: Prompt, system_prompt: Optional[str]) -> str:
+        payload = "\x1f".join((model_id, system_prompt or "", flatten_prompt(prompt)))
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)", (key, response))
+            self._conn.commit()
+
+
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(path: str = DEFAULT_CACHE_PATH) -> ResponseCache:
+    """One ResponseCache per file, opened on first use and shared afterwards."""
+    path = os.path.abspath(path)
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ResponseCache(path)
+        return cache
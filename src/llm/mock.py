@@ -1,14 +1,23 @@
-from typing import Generator, Optional
-from .base import LLMProvider
+from typing import Generator, Optional, Type
+from .base import LLMProvider, Prompt, Schema
 
 class MockProvider(LLMProvider):
     def __init__(self):
-        pass
+        super().__init__()
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(self, prompt: Prompt, system_prompt: Optional[str] = None) -> str:
         return "This is a mock response from the MockProvider."
 
-    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def generate_structured(self, prompt: Prompt, schema: Type[Schema], system_prompt: Optional[str] = None) -> Schema:
+        # Required booleans are False, every other required field is the mock text
+        values = {
+            name: False if field.annotation is bool else self.generate(prompt, system_prompt)
+            for name, field in schema.model_fields.items()
+            if field.is_required()
+        }
+        return schema(**values)
+
+    def generate_stream(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
         response = "This is a mock streaming response."
         for word in response.split():
             yield word + " "
@@ -1,32 +1,85 @@
+import atexit
+import json
 import os
-from typing import Generator, Optional
-from .base import LLMProvider
+import threading
+import time
+from typing import Generator, List, Optional, Tuple, Type, Union
+from .base import BatchRequestError, LLMProvider, Prompt, Schema, StructuredOutputError, flatten_prompt
+
+# Seconds between status checks while a batch job is running
+BATCH_POLL_INTERVAL = 30.0
+
+# Transient failures (429, 5xx, timeouts, dropped connections) are retried
+# with exponential backoff and jitter; a hung request is cut off after
+# DEFAULT_TIMEOUT seconds (for streams: that long without a chunk)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 60.0
 
 #
 # SAFE, STABLE, TOKEN-TRACKED PROVIDERS
 #
+# SDKs are imported inside each provider's constructor, so importing this
+# module (or only using MockProvider) never pays for SDKs that go unused.
+#
+
+# -------------- SHARED HTTP CONNECTION POOL ---------------
+_HTTP_CLIENT = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _shared_http_client():
+    """
+    One keep-alive connection pool shared by every OpenAI/Anthropic client in
+    the process, so providers built per worker don't each redo TLS handshakes.
+    Returns None when httpx is unavailable (the SDKs then use their own).
+    """
+    global _HTTP_CLIENT
+    # httpx ships with both the openai and anthropic SDKs; HTTP/2 additionally needs h2
+    try:
+        import httpx
+    except ImportError:
+        return None
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=60.0,
+            )
+            atexit.register(_HTTP_CLIENT.close)
+    return _HTTP_CLIENT
 
-# -------------- OPENAI PROVIDER ---------------
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
 
+# -------------- OPENAI PROVIDER ---------------
 
 class OpenAIProvider(LLMProvider):
-    def __init__(self, model: str = "gpt-4.1-mini", api_key: Optional[str] = None):
+    def __init__(self, model: str = "gpt-4.1-mini", api_key: Optional[str] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT):
         super().__init__()
-        if OpenAI is None:
+        try:
+            from openai import OpenAI
+        except ImportError:
             raise ImportError("OpenAI library not installed. Run: pip install openai")
-        self.client = OpenAI(api_key=api_key or os.environ.get("OPENAI_API_KEY"))
+        self.client = OpenAI(
+            api_key=api_key or os.environ.get("OPENAI_API_KEY"),
+            http_client=_shared_http_client(),
+            max_retries=max_retries,
+            timeout=timeout,
+        )
         self.model = model
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(self, prompt: Prompt, system_prompt: Optional[str] = None) -> str:
         # --- Build messages ---
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages.append({"role": "user", "content": flatten_prompt(prompt)})
 
         # --- Call non-streaming completion ---
         response = self.client.chat.completions.create(
@@ -43,76 +96,152 @@ class OpenAIProvider(LLMProvider):
 
         return response.choices[0].message.content
 
-    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def generate_structured(self, prompt: Prompt, schema: Type[Schema], system_prompt: Optional[str] = None) -> Schema:
+        """Uses OpenAI structured outputs, so the reply is constrained to the schema."""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": flatten_prompt(prompt)})
+
+        response = self.client.beta.chat.completions.parse(
+            model=self.model,
+            messages=messages,
+            response_format=schema,
+        )
+
+        if response.usage:
+            self.add_usage(
+                prompt_tokens=response.usage.prompt_tokens or 0,
+                completion_tokens=response.usage.completion_tokens or 0,
+            )
+
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise StructuredOutputError(
+                f"OpenAI returned no {schema.__name__}: {message.refusal}", message.refusal or message.content or ""
+            )
+        return message.parsed
+
+    def generate_stream(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
         """
         SAFE STREAMING IMPLEMENTATION:
-        - Never modifies token counters during streaming
-        - After stream ends, makes one followup non-stream call to get usage
+        - Never modifies token counters mid-response
+        - Usage arrives on the final chunk of the same stream (include_usage)
         """
 
         # --- Prepare messages ---
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
+        messages.append({"role": "user", "content": flatten_prompt(prompt)})
 
-        # ---- First pass: streaming text to user ---
+        # ---- Single streaming request ---
         stream = self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             stream=True,
+            stream_options={"include_usage": True},
         )
 
-        full_text = ""  # reconstruct for completeness
-
         for event in stream:
-            # SAFETY: skip malformed chunks
-            if not hasattr(event, "choices") or not event.choices:
-                continue
-            delta = event.choices[0].delta
-            if delta is None:
-                continue
-            if not hasattr(delta, "content"):
-                continue
-            if delta.content is None:
-                continue
-            if not isinstance(delta.content, str):
+            # The usage chunk comes last and has no choices
+            if getattr(event, "usage", None):
+                self.add_usage(
+                    prompt_tokens=event.usage.prompt_tokens or 0,
+                    completion_tokens=event.usage.completion_tokens or 0,
+                )
+
+            # The SDK guarantees the chunk shape; only role/tool/usage
+            # chunks lack text, so one check covers them
+            if not event.choices:
                 continue
+            token = event.choices[0].delta.content
+            if token:
+                yield token
 
-            token = delta.content
-            full_text += token
-            yield token
-
-        # ---- Second pass: non-streaming call to retrieve usage safely ----
-        followup = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
+    def batch_generate(self, prompts: List[Tuple[Prompt, Optional[str]]]) -> List[Union[str, BatchRequestError]]:
+        """
+        Runs all prompts through the Batch API (/v1/chat/completions, 24h window).
+        Blocks until the batch finishes; prompts whose request failed come back
+        as a BatchRequestError.
+        """
+        lines = []
+        for i, (prompt, system_prompt) in enumerate(prompts):
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": flatten_prompt(prompt)})
+            lines.append(json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": messages},
+            }))
+
+        input_file = self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
         )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(BATCH_POLL_INTERVAL)
+            batch = self.client.batches.retrieve(batch.id)
+        if batch.status != "completed":
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
 
-        if hasattr(followup, "usage") and followup.usage:
+        outputs = [BatchRequestError(f"OpenAI batch {batch.id} has no result for request {i}") for i in range(len(prompts))]
+        if batch.output_file_id is None:
+            return outputs
+
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                error = record.get("error") or (response.get("body") or {}).get("error") or {}
+                outputs[int(record["custom_id"])] = BatchRequestError(
+                    f"OpenAI batch request failed ({response.get('status_code')}): {error.get('message', error)}"
+                )
+                continue
+            body = response["body"]
+            usage = body.get("usage") or {}
             self.add_usage(
-                prompt_tokens=followup.usage.prompt_tokens or 0,
-                completion_tokens=followup.usage.completion_tokens or 0,
+                prompt_tokens=usage.get("prompt_tokens") or 0,
+                completion_tokens=usage.get("completion_tokens") or 0,
             )
+            outputs[int(record["custom_id"])] = body["choices"][0]["message"]["content"] or ""
 
+        return outputs
 
-# -------------- ANTHROPIC PROVIDER ---------------
-try:
-    from anthropic import Anthropic
-except ImportError:
-    Anthropic = None
 
+# -------------- ANTHROPIC PROVIDER ---------------
 
 class AnthropicProvider(LLMProvider):
-    def __init__(self, model: str = "claude-3-haiku-20240307", api_key: Optional[str] = None):
+    def __init__(self, model: str = "claude-3-haiku-20240307", api_key: Optional[str] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT):
         super().__init__()
-        if Anthropic is None:
+        try:
+            from anthropic import Anthropic
+        except ImportError:
             raise ImportError("Anthropic not installed. Run: pip install anthropic")
 
-        self.client = Anthropic(api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"))
+        self.client = Anthropic(
+            api_key=api_key or os.environ.get("ANTHROPIC_API_KEY"),
+            http_client=_shared_http_client(),
+            max_retries=max_retries,
+            timeout=timeout,
+        )
         self.model = model
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    def generate(self, prompt: Prompt, system_prompt: Optional[str] = None) -> str:
+        # Block prompts are passed through as-is so their cache_control
+        # breakpoints reach the API
         response = self.client.messages.create(
             model=self.model,
             max_tokens=1024,
@@ -129,59 +258,158 @@ class AnthropicProvider(LLMProvider):
 
         return response.content[0].text
 
-    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def generate_structured(self, prompt: Prompt, schema: Type[Schema], system_prompt: Optional[str] = None) -> Schema:
+        """Forces a single tool call whose input schema is the model's JSON schema."""
+        tool_name = schema.__name__
+        params = {
+            "model": self.model,
+            "max_tokens": 1024,
+            "messages": [{"role": "user", "content": prompt}],
+            "tools": [{
+                "name": tool_name,
+                "description": f"Record the {tool_name}.",
+                "input_schema": schema.model_json_schema(),
+            }],
+            "tool_choice": {"type": "tool", "name": tool_name},
+        }
+        if system_prompt:
+            params["system"] = system_prompt
+        response = self.client.messages.create(**params)
+
+        if response.usage:
+            self.add_usage(
+                prompt_tokens=response.usage.input_tokens or 0,
+                completion_tokens=response.usage.output_tokens or 0,
+            )
 
-        stream = self.client.messages.stream(
+        for block in response.content:
+            if block.type == "tool_use":
+                try:
+                    return schema.model_validate(block.input)
+                except ValueError as e:
+                    raise StructuredOutputError(
+                        f"Anthropic {tool_name} call does not match the schema: {e}", json.dumps(block.input)
+                    ) from e
+        text = "".join(block.text for block in response.content if block.type == "text")
+        raise StructuredOutputError(f"Anthropic returned no {tool_name} tool call", text)
+
+    def generate_stream(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+
+        # Single request: usage is read from the final message of this stream
+        with self.client.messages.stream(
             model=self.model,
             max_tokens=1024,
             system=system_prompt,
             messages=[{"role": "user", "content": prompt}],
-        )
+        ) as stream:
+            for text in stream.text_stream:
+                if not isinstance(text, str):
+                    continue
+                if text.strip() == "":
+                    continue
 
-        full_text = ""
-
-        for text in stream.text_stream:
-            if not isinstance(text, str):
-                continue
-            if text.strip() == "":
-                continue
+                yield text
 
-            full_text += text
-            yield text
+            # Get usage from final info
+            usage = stream.get_final_message().usage
 
-        # Get usage from final info
-        usage = stream.get_final_response().usage
         if usage:
             self.add_usage(
                 prompt_tokens=usage.input_tokens or 0,
                 completion_tokens=usage.output_tokens or 0
             )
 
+    def batch_generate(self, prompts: List[Tuple[Prompt, Optional[str]]]) -> List[Union[str, BatchRequestError]]:
+        """
+        Runs all prompts through the Message Batches API.
+        Blocks until the batch has ended; prompts whose request failed come
+        back as a BatchRequestError.
+        """
+        requests = []
+        for i, (prompt, system_prompt) in enumerate(prompts):
+            params = {
+                "model": self.model,
+                "max_tokens": 1024,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+            if system_prompt:
+                params["system"] = system_prompt
+            requests.append({"custom_id": str(i), "params": params})
+
+        batch = self.client.messages.batches.create(requests=requests)
+        while batch.processing_status != "ended":
+            time.sleep(BATCH_POLL_INTERVAL)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        outputs = [BatchRequestError(f"Anthropic batch {batch.id} has no result for request {i}") for i in range(len(prompts))]
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                detail = getattr(entry.result, "error", None)
+                outputs[int(entry.custom_id)] = BatchRequestError(
+                    f"Anthropic batch request {entry.result.type}" + (f": {detail}" if detail else "")
+                )
+                continue
+            message = entry.result.message
+            if message.usage:
+                self.add_usage(
+                    prompt_tokens=message.usage.input_tokens or 0,
+                    completion_tokens=message.usage.output_tokens or 0,
+                )
+            outputs[int(entry.custom_id)] = message.content[0].text
+
+        return outputs
 
-# -------------- GEMINI PROVIDER ---------------
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
 
+# -------------- GEMINI PROVIDER ---------------
 
 class GeminiProvider(LLMProvider):
-    def __init__(self, model: str = "gemini-1.5-flash", api_key: Optional[str] = None):
+    def __init__(self, model: str = "gemini-1.5-flash", api_key: Optional[str] = None,
+                 system_prompt: Optional[str] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT):
         super().__init__()
-        if genai is None:
+        try:
+            import google.generativeai as genai
+            from google.api_core import exceptions as google_exceptions
+            from google.api_core import retry as google_retry
+        except ImportError:
             raise ImportError("google-generativeai not installed")
+        self._genai = genai
 
         key = api_key or os.environ.get("GOOGLE_API_KEY")
         if not key:
             raise ValueError("GOOGLE_API_KEY not found")
         genai.configure(api_key=key)
 
-        self.model = genai.GenerativeModel(model)
+        self.model_name = model
+        # The system prompt goes in system_instruction rather than being inlined
+        # into every user turn, so one model is kept per distinct system prompt
+        self._models = {}
+        self.model = self._model_for(system_prompt)
+
+        # Same policy as the other providers, via google.api_core's jittered backoff
+        retry = google_retry.Retry(
+            predicate=google_retry.if_exception_type(
+                google_exceptions.ResourceExhausted,
+                google_exceptions.ServiceUnavailable,
+                google_exceptions.DeadlineExceeded,
+                google_exceptions.InternalServerError,
+            ),
+            initial=1.0,
+            maximum=30.0,
+            multiplier=2.0,
+            timeout=timeout * (max_retries + 1),
+        )
+        self.request_options = {"retry": retry, "timeout": timeout}
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        full_prompt = f"System: {system_prompt}\n\nUser: {prompt}" if system_prompt else prompt
+    def _model_for(self, system_prompt: Optional[str]):
+        model = self._models.get(system_prompt)
+        if model is None:
+            model = self._genai.GenerativeModel(self.model_name, system_instruction=system_prompt)
+            self._models[system_prompt] = model
+        return model
 
-        response = self.model.generate_content(full_prompt)
+    def generate(self, prompt: Prompt, system_prompt: Optional[str] = None) -> str:
+        response = self._model_for(system_prompt).generate_content(flatten_prompt(prompt), request_options=self.request_options)
 
         # SAFE TOKEN COUNT (Gemini API supports usage tokens)
         if hasattr(response, "usage_metadata") and response.usage_metadata:
@@ -192,13 +420,11 @@ class GeminiProvider(LLMProvider):
 
         return response.text
 
-    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
+    def generate_stream(self, prompt: Prompt, system_prompt: Optional[str] = None) -> Generator[str, None, None]:
 
-        full_prompt = f"System: {system_prompt}\n\nUser: {prompt}" if system_prompt else prompt
-
-        stream = self.model.generate_content(full_prompt, stream=True)
-
-        full_text = ""
+        stream = self._model_for(system_prompt).generate_content(
+            flatten_prompt(prompt), stream=True, request_options=self.request_options
+        )
 
         for chunk in stream:
             if not hasattr(chunk, "text"):
@@ -210,7 +436,6 @@ class GeminiProvider(LLMProvider):
             if chunk.text.strip() == "":
                 continue
 
-            full_text += chunk.text
             yield chunk.text
 
         # After stream ends, Gemini also provides usage metadata:
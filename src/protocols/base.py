@@ -1,9 +1,81 @@
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 from ..agents.agent import DebaterAgent
+from ..llm.base import Prompt
+from ..llm.batcher import FinalAnswerBatcher
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Boilerplate shared by several protocols' prompt templates
+SHORT_ANSWER_EXAMPLES = "(e.g. 'yes', 'no', a name, or a short noun phrase)"
+FINAL_ANSWER_FORMAT = f"{FINAL_ANSWER_MARKER} <one short answer only {SHORT_ANSWER_EXAMPLES}>\n\n"
+NO_EXTRA_TEXT = "Do NOT include any reasoning, explanations, or extra text."
+NO_TOOLS = "Do NOT mention using tools or browsing the web."
+
+
+def cacheable_prompt(static: str, dynamic: str) -> List[Dict[str, Any]]:
+    """
+    Splits a prompt into a stable prefix, marked as a prompt-cache breakpoint,
+    and the per-item/per-turn tail. Joined, the blocks equal static + dynamic.
+    """
+    return [
+        {"type": "text", "text": static, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": dynamic},
+    ]
+
+# The item's context block; it opens the dynamic part of every first prompt
+CONTEXT_TMPL = "Context:\n{context}\n\n"
+
+# A FinalAnswerBatcher only fills batches when debates run concurrently
+SERIAL_BATCHER_ERROR = "final_batcher requires concurrent debates (max_concurrency > 1)."
+
+
+def cacheable_opening(persona: str, context: str, rest: str) -> List[Dict[str, Any]]:
+    """
+    A protocol's opening prompt, split after the item's context. A bare
+    persona is far below the provider's minimum cacheable prefix; with the
+    context included, the prefix is long enough to cache and is identical
+    for the same item in every run.
+    """
+    return cacheable_prompt(persona + CONTEXT_TMPL.format(context=context), rest)
+
+class Transcript:
+    """
+    A debate transcript kept as parallel role/content lists while the debate
+    runs; to_list() gives the list-of-dicts form that results carry.
+    """
+
+    def __init__(self):
+        self.roles: List[str] = []
+        self.contents: List[str] = []
+
+    def append(self, role: str, content: str):
+        self.roles.append(role)
+        self.contents.append(content)
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def to_list(self) -> List[Dict[str, str]]:
+        return [{"role": role, "content": content} for role, content in zip(self.roles, self.contents)]
 
 class DebateProtocol(ABC):
-    """Abstract base class for debate protocols."""
+    """
+    Abstract base class for debate protocols.
+
+    Invariant: a protocol instance holds no per-item state. Everything an item
+    needs is passed to run() (question, agents, context, kwargs), so the runner
+    can reuse one instance for every item, including concurrently running ones.
+    """
+
+    # Single-turn protocols that can hand all their prompts to
+    # LLMProvider.batch_generate at once (see ExperimentRunner.run_experiment_batch)
+    supports_batch = False
+
+    # Compiled once and shared by every protocol that tracks interim answers
+    _PROVISIONAL_RE = re.compile(r"Provisional Answer:\s*(.+)")
 
     @abstractmethod
     def run(self, question: str, agents: List[DebaterAgent], context: str = "", **kwargs) -> Dict[str, Any]:
@@ -20,11 +92,51 @@ class DebateProtocol(ABC):
         """
         pass
 
+    def run_many(self, items: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Runs several debates concurrently and returns their results in order.
+
+        Each item is a dict of run() keyword arguments (question, agents,
+        context, ...). Items must not share agents, since agents record
+        their own exchanges; providers may be shared.
+        """
+        if max_concurrency <= 1:
+            if any(item.get("final_batcher") is not None for item in items):
+                raise ValueError(SERIAL_BATCHER_ERROR)
+            return [self.run(**item) for item in items]
+        # Every call is blocked on LLM round trips, so threads overlap them
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            return list(pool.map(lambda item: self.run(**item), items))
+
+    def _speak_final(self, agent: DebaterAgent, prompt: Prompt,
+                     final_batcher: Optional[FinalAnswerBatcher] = None) -> str:
+        """
+        agent.speak(prompt) for the closing Final Answer turn. With a batcher,
+        the call is queued alongside other debates' final turns and sent
+        through the provider's batch API instead. That only pays off when
+        debates run concurrently: a serial run would wait out max_wait and a
+        batch round trip for a one-prompt batch, so run_many and
+        ExperimentRunner.run_experiment reject a batcher without concurrency.
+        """
+        if final_batcher is None:
+            return agent.speak(prompt)
+        full_prompt, system_prompt = agent.build_request(prompt)
+        response = final_batcher.submit(full_prompt, system_prompt).result()
+        agent.record_exchange(prompt, response)
+        return response
+
     def _extract_final_answer(self, text: str) -> str:
         """
         Extracts the final answer from the text.
         Looks for 'Final Answer: <answer>'.
         """
-        if "Final Answer:" in text:
-            return text.split("Final Answer:")[-1].strip()
+        # Only the text after the last marker is needed, so avoid split()
+        idx = text.rfind(FINAL_ANSWER_MARKER)
+        if idx >= 0:
+            return text[idx + len(FINAL_ANSWER_MARKER):].strip()
         return text
+
+    def _extract_provisional_answer(self, text: str) -> Optional[str]:
+        """The last 'Provisional Answer: <answer>' in the text, or None if there is none."""
+        answers = self._PROVISIONAL_RE.findall(text)
+        return answers[-1].strip() if answers else None
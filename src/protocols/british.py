@@ -1,122 +1,336 @@
-from typing import List, Dict, Any
-from .base import DebateProtocol
+import io
+import json
+import logging
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from .base import DebateProtocol, Transcript, cacheable_opening, FINAL_ANSWER_FORMAT, NO_EXTRA_TEXT, NO_TOOLS, SHORT_ANSWER_EXAMPLES
 from ..agents.agent import DebaterAgent
+from ..llm.base import StructuredOutputError
+from ..llm.batcher import FinalAnswerBatcher
+from .schemas import FinalAnswer, POIDecision
+
+logger = logging.getLogger(__name__)
+
+# Stable opening of the Government's first prompt; together with the item's context it forms the cached prefix
+GOV_PERSONA = "You are the Government side in a British Parliamentary style debate on a QA benchmark question.\n\n"
+
+# A partial POI batch is sent once its oldest chunk has waited this long. The
+# deadline is only checked as tokens arrive, so while the stream stalls a
+# batch waits for the next token (or the end of the speech) and can overrun it.
+POI_FLUSH_SECONDS = 0.5
+
+# Fallback for batched POI replies that aren't valid JSON: "<id>: INTERRUPT: <reason>"
+_POI_LINE_RE = re.compile(r"^\W*(\d+)\W+INTERRUPT:\s*(.+)$", re.MULTILINE)
+
+# A chunk ending (ignoring trailing whitespace) in one of these closes a sentence
+_SENTENCE_ENDS = frozenset(".?!")
+
+# poi_prefilter: a chunk is only checked if it makes a number claim (digits
+# or a magnitude word), names something (two or more capitalised words in a
+# row mid-sentence, e.g. "by Barack Obama", "the United States") or asserts
+# an absolute. Lone capitalised words ("I", a single name) are not enough.
+_POI_WORTHY_RE = re.compile(
+    r"\d"
+    r"|(?i:\b(?:hundred|thousand|million|billion|percent)\b)"
+    r"|[a-z,;:]\s+[A-Z][a-z]+\s+(?:(?:of|the|de|von)\s+)?[A-Z][a-z]+"
+    r"|(?i:\b(?:always|never|none|clearly|certainly|definitely)\b)"
+)
+
+_GOV_OPENING_TMPL = (
+    "Question: {question}\n\n"
+    "Your job:\n"
+    "1. Decide on a concrete short answer to the question.\n"
+    "2. Give an opening speech of 4–7 sentences supporting that answer with clear, factual reasoning.\n"
+    "3. Somewhere in your speech include a single line of the form:\n"
+    "   Proposed Answer: <one short answer " + SHORT_ANSWER_EXAMPLES + ">\n"
+    "4. Avoid repetition and rhetorical fluff; focus on correctness.\n"
+    + NO_TOOLS
+)
+
+_OPP_REBUTTAL_TMPL = (
+    "You are the Opposition side in a British Parliamentary style debate on a QA benchmark question.\n\n"
+    "Question: {question}\n\n"
+    "The Government's full speech was:\n{full_speech}\n\n"
+    "Your job:\n"
+    "1. Identify the single most important factual disagreement or alternative answer to the question.\n"
+    "2. Give a closing rebuttal of 4–7 sentences focusing on why an alternative answer is more likely correct.\n"
+    "3. At the end, on a new line, output:\n"
+    "   Opposition Proposed Answer: <one short answer (or SAME if you agree with Government)>\n"
+    "Keep the focus on factual correctness, not style."
+)
+
+_FINAL_INTRO_TMPL = (
+    "You are the Government side giving a final, concise answer after a British Parliamentary style debate.\n\n"
+    "Question: {question}\n\n"
+    "You have already given an opening speech and responded to Points of Information. "
+    "The Opposition has given a rebuttal:\n"
+    "{opp_response}\n\n"
+    "Based on all arguments, decide the single best short answer to the question.\n\n"
+)
+_FINAL_TMPL = (
+    _FINAL_INTRO_TMPL +
+    "Output exactly ONE line in this format:\n"
+    + FINAL_ANSWER_FORMAT
+    + NO_EXTRA_TEXT
+)
+_FINAL_STRUCTURED_TMPL = (
+    _FINAL_INTRO_TMPL +
+    "Give it as the answer: one short answer only " + SHORT_ANSWER_EXAMPLES + "."
+)
+
+# Shared by the single-chunk and batched POI checks
+_POI_PRIVATE = (
+    "You are the Opposition in a British Parliamentary debate, but this is your PRIVATE thinking, "
+    "not a public speech.\n"
+)
+_POI_CRITERION = (
+    "- Decide if there is a clear factual error, missing key fact, or strong counterpoint that would "
+    "significantly change which short answer is most likely correct.\n"
+)
+
+# POI check prompts put the speech excerpt last: everything before it depends
+# only on the question, so every check during one speech shares a
+# byte-identical prefix that a prompt/KV cache can reuse
+_POI_CHECK_PREFIX_TMPL = (
+    "Question: {question}\n\n"
+    + _POI_PRIVATE +
+    "Your job now, for the part of the Government's speech quoted at the end:\n"
+    + _POI_CRITERION +
+    "- If YES, respond EXACTLY in this format:\n"
+    "  INTERRUPT: <one short sentence POI pointing out that issue>\n"
+    "- If NO, respond with exactly:\n"
+    "  NO\n\n"
+    "No extra text, no explanations beyond that format.\n\n"
+    "The Government just said (this part of their speech):\n"
+)
+
+_POI_STRUCTURED_PREFIX_TMPL = (
+    "Question: {question}\n\n"
+    + _POI_PRIVATE +
+    "Your job now, for the part of the Government's speech quoted at the end:\n"
+    + _POI_CRITERION +
+    "- If YES, set interrupt to true and give one short sentence POI pointing out that issue as the reason.\n"
+    "- If NO, set interrupt to false.\n\n"
+    "The Government just said (this part of their speech):\n"
+)
+
+_POI_BATCH_PREFIX_TMPL = (
+    "Question: {question}\n\n"
+    + _POI_PRIVATE +
+    "Your job now, for EACH numbered part of the Government's speech listed at the end:\n"
+    + _POI_CRITERION +
+    "Respond with ONLY a JSON array containing one object per part, in order:\n"
+    "  {{\"id\": <part number>, \"decision\": \"NO\"}}\n"
+    "  or {{\"id\": <part number>, \"decision\": \"INTERRUPT\", \"reason\": \"<one short sentence POI>\"}}\n\n"
+    "No extra text outside the JSON array.\n\n"
+    "The Government just said these consecutive parts of their speech:\n"
+)
+
+_GOV_ADDRESS_TMPL = (
+    "Question: {question}\n\n"
+    "The Opposition offered a Point of Information (POI): {reason}\n\n"
+    "You are the Government. Briefly address this POI in at most 3 sentences, "
+    "clarifying or correcting your reasoning, and then continue your speech mentally.\n"
+    "Do NOT restate your whole case; just answer the POI.\n"
+    "This is a public response to the POI."
+)
 
 class BritishParliamentaryProtocol(DebateProtocol):
     """British Parliamentary: Streaming speech with interruption (POI), tuned for QA."""
 
-    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 2, **kwargs) -> Dict[str, Any]:
+    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 2,
+            poi_workers: int = 4, poi_batch_size: int = 1, final_batcher: Optional[FinalAnswerBatcher] = None,
+            poi_prefilter: bool = False, structured: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        With poi_prefilter, speech chunks that make no checkable claim (see
+        _worth_poi) are not sent to the Opposition for a POI check; skipped
+        chunks are logged at DEBUG so the filter's misses can be reviewed.
+
+        With structured, single-chunk POI checks and the final answer are
+        requested as POIDecision / FinalAnswer models (provider structured
+        output) instead of being parsed out of free text. A reply that doesn't
+        fit the model counts as "NO" for a POI check, and the final answer
+        falls back to _extract_final_answer on the raw reply. The structured
+        final turn is a single call, so it cannot be combined with final_batcher.
+        """
+        if structured and final_batcher is not None:
+            raise ValueError("BritishParliamentaryProtocol: structured=True cannot be combined with final_batcher.")
         if len(agents) != 2:
             raise ValueError("BritishParliamentaryProtocol requires exactly two agents (Government, Opposition).")
         
         gov, opp = agents
-        transcript = []
+        transcript = Transcript()
         
         # --- Government Opening (streamed) ---
-        gov_prompt = (
-            "You are the Government side in a British Parliamentary style debate on a QA benchmark question.\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {question}\n\n"
-            "Your job:\n"
-            "1. Decide on a concrete short answer to the question.\n"
-            "2. Give an opening speech of 4–7 sentences supporting that answer with clear, factual reasoning.\n"
-            "3. Somewhere in your speech include a single line of the form:\n"
-            "   Proposed Answer: <one short answer (e.g. 'yes', 'no', a name, or a short noun phrase)>\n"
-            "4. Avoid repetition and rhetorical fluff; focus on correctness.\n"
-            "Do NOT mention using tools or browsing the web."
-        )
+        gov_prompt = cacheable_opening(GOV_PERSONA, context, _GOV_OPENING_TMPL.format(question=question))
         
         # Streaming generation
         stream = gov.speak_stream(gov_prompt)
         
-        full_speech = ""
-        current_chunk = ""
+        # The speech streams into one buffer that is read out once at the
+        # end; the chunk buffer only ever holds the ~sentence being checked
+        speech = io.StringIO()
+        chunk_buf = deque()
+        chunk_len = 0
+        # Last non-whitespace character of the chunk, i.e. chunk.strip()[-1:]
+        last_char = ""
         interruption_count = 0
         
-        transcript.append({"role": "System", "content": f"Government ({gov.name}) starts speaking."})
+        transcript.append("System", f"Government ({gov.name}) starts speaking.")
         
-        for token in stream:
-            full_speech += token
-            current_chunk += token
-            
-            # Check for interruption every ~sentence or when chunk is long enough
-            if len(current_chunk) > 120 or (current_chunk.strip().endswith(('.', '?', '!')) and len(current_chunk) > 40):
+        # POI checks run on worker threads while the speech keeps streaming;
+        # their decisions are settled strictly in speech order. With
+        # poi_batch_size > 1, up to that many chunks share one check.
+        pending = deque()
+        batch = []
+        batch_started = 0.0
+
+        # Built once per speech; each check only appends its excerpt
+        check_prefix = (_POI_STRUCTURED_PREFIX_TMPL if structured else _POI_CHECK_PREFIX_TMPL).format(question=question)
+        batch_prefix = _POI_BATCH_PREFIX_TMPL.format(question=question)
+
+        with ThreadPoolExecutor(max_workers=poi_workers) as poi_pool:
+            def submit_batch():
                 # Ask Opposition if they want to interrupt
-                opp_check_prompt = (
-                    f"Question: {question}\n\n"
-                    f"The Government just said (this part of their speech):\n\"{current_chunk.strip()}\"\n\n"
-                    "You are the Opposition in a British Parliamentary debate, but this is your PRIVATE thinking, "
-                    "not a public speech.\n"
-                    "Your job now:\n"
-                    "- Decide if there is a clear factual error, missing key fact, or strong counterpoint that would "
-                    "significantly change which short answer is most likely correct.\n"
-                    "- If YES, respond EXACTLY in this format:\n"
-                    "  INTERRUPT: <one short sentence POI pointing out that issue>\n"
-                    "- If NO, respond with exactly:\n"
-                    "  NO\n\n"
-                    "No extra text, no explanations beyond that format."
-                )
-                decision = opp.speak(opp_check_prompt)
-                
-                if "INTERRUPT:" in decision:
-                    reason = decision.split("INTERRUPT:", 1)[1].strip()
-                    transcript.append({"role": opp.name, "content": f"POI: {reason}"})
-                    interruption_count += 1
-                    
-                    # Government has to address it briefly
-                    gov_address_prompt = (
-                        f"Question: {question}\n\n"
-                        f"The Opposition offered a Point of Information (POI): {reason}\n\n"
-                        "You are the Government. Briefly address this POI in at most 3 sentences, "
-                        "clarifying or correcting your reasoning, and then continue your speech mentally.\n"
-                        "Do NOT restate your whole case; just answer the POI.\n"
-                        "This is a public response to the POI."
-                    )
-                    gov_response = gov.speak(gov_address_prompt)
-                    transcript.append({"role": gov.name, "content": f"Response to POI: {gov_response}"})
-                    
-                    # Reset chunk after interruption handling
-                    current_chunk = "" 
+                if len(batch) == 1:
+                    opp_check_prompt = f"{check_prefix}\"{batch[0]}\""
                 else:
-                    # No interruption; reset chunk to simulate focusing on the next segment
-                    current_chunk = ""
+                    opp_check_prompt = batch_prefix + self._poi_listing(batch)
+                if len(batch) == 1 and structured:
+                    future = poi_pool.submit(self._structured_poi, opp, opp_check_prompt)
+                else:
+                    future = poi_pool.submit(opp.respond, opp_check_prompt)
+                pending.append((future, opp_check_prompt, len(batch)))
+                batch.clear()
+
+            for token in stream:
+                speech.write(token)
+                chunk_buf.append(token)
+                chunk_len += len(token)
+                for ch in reversed(token):
+                    if not ch.isspace():
+                        last_char = ch
+                        break
+                
+                # Check for interruption every ~sentence or when chunk is long enough
+                if chunk_len > 120 or (chunk_len > 40 and last_char in _SENTENCE_ENDS):
+                    chunk = "".join(chunk_buf).strip()
+                    if poi_prefilter and not self._worth_poi(chunk):
+                        logger.debug("Skipped POI check for chunk: %r", chunk)
+                    else:
+                        if not batch:
+                            batch_started = time.monotonic()
+                        batch.append(chunk)
+                    # Reset chunk to simulate focusing on the next segment
+                    chunk_buf.clear()
+                    chunk_len = 0
+                    last_char = ""
+
+                if batch and (len(batch) >= poi_batch_size or time.monotonic() - batch_started >= POI_FLUSH_SECONDS):
+                    submit_batch()
+
+                while pending and pending[0][0].done():
+                    future, opp_check_prompt, n_chunks = pending.popleft()
+                    interruption_count += self._settle_poi(question, gov, opp, transcript, opp_check_prompt, future.result(), n_chunks)
+
+            # Speech is over; check the last partial batch and settle everything in flight
+            if batch:
+                submit_batch()
+            while pending:
+                future, opp_check_prompt, n_chunks = pending.popleft()
+                interruption_count += self._settle_poi(question, gov, opp, transcript, opp_check_prompt, future.result(), n_chunks)
 
-        transcript.append({"role": gov.name, "content": f"Full Speech: {full_speech}"})
+        full_speech = speech.getvalue()
+        speech.close()
+        transcript.append(gov.name, f"Full Speech: {full_speech}")
         
         # --- Opposition Rebuttal (non-streaming) ---
-        opp_rebuttal_prompt = (
-            "You are the Opposition side in a British Parliamentary style debate on a QA benchmark question.\n\n"
-            f"Question: {question}\n\n"
-            f"The Government's full speech was:\n{full_speech}\n\n"
-            "Your job:\n"
-            "1. Identify the single most important factual disagreement or alternative answer to the question.\n"
-            "2. Give a closing rebuttal of 4–7 sentences focusing on why an alternative answer is more likely correct.\n"
-            "3. At the end, on a new line, output:\n"
-            "   Opposition Proposed Answer: <one short answer (or SAME if you agree with Government)>\n"
-            "Keep the focus on factual correctness, not style."
-        )
+        opp_rebuttal_prompt = _OPP_REBUTTAL_TMPL.format(question=question, full_speech=full_speech)
         opp_response = opp.speak(opp_rebuttal_prompt)
-        transcript.append({"role": opp.name, "content": opp_response})
+        transcript.append(opp.name, opp_response)
 
         # --- Final Answer Step (Government wraps up) ---
-        final_prompt = (
-            "You are the Government side giving a final, concise answer after a British Parliamentary style debate.\n\n"
-            f"Question: {question}\n\n"
-            "You have already given an opening speech and responded to Points of Information. "
-            "The Opposition has given a rebuttal:\n"
-            f"{opp_response}\n\n"
-            "Based on all arguments, decide the single best short answer to the question.\n\n"
-            "Output exactly ONE line in this format:\n"
-            "Final Answer: <one short answer only (e.g. 'yes', 'no', a name, or a short noun phrase)>\n\n"
-            "Do NOT include any reasoning, explanations, or extra text."
-        )
-        final_response = gov.speak(final_prompt)
-        transcript.append({"role": gov.name, "content": final_response})
+        if structured:
+            final_prompt = _FINAL_STRUCTURED_TMPL.format(question=question, opp_response=opp_response)
+            try:
+                final_answer = gov.speak_structured(final_prompt, FinalAnswer).answer.strip()
+                final_response = f"Final Answer: {final_answer}"
+            except StructuredOutputError as e:
+                final_response = e.text
+                final_answer = self._extract_final_answer(final_response)
+        else:
+            final_prompt = _FINAL_TMPL.format(question=question, opp_response=opp_response)
+            final_response = self._speak_final(gov, final_prompt, final_batcher)
+            final_answer = self._extract_final_answer(final_response)
+        transcript.append(gov.name, final_response)
 
         return {
             "protocol": "BritishParliamentary",
             "question": question,
-            "transcript": transcript,
+            "transcript": transcript.to_list(),
             "interruptions": interruption_count,
-            "final_answer": self._extract_final_answer(final_response),
+            "final_answer": final_answer,
         }
+
+    def _structured_poi(self, opp: DebaterAgent, opp_check_prompt: str) -> str:
+        """A structured POI check, rendered as the "NO" / "INTERRUPT: ..." decision _settle_poi takes."""
+        try:
+            decision = opp.respond_structured(opp_check_prompt, POIDecision)
+        except StructuredOutputError:
+            # Same outcome as an unparseable text-mode reply
+            return "NO"
+        if decision.interrupt:
+            return f"INTERRUPT: {decision.reason or ''}"
+        return "NO"
+
+    def _worth_poi(self, chunk: str) -> bool:
+        """Cheap guess at whether a speech chunk could contain a claim worth a POI."""
+        return _POI_WORTHY_RE.search(chunk) is not None
+
+    def _poi_listing(self, chunks: List[str]) -> str:
+        """The numbered excerpts that close a batched POI check."""
+        return "\n".join(f"{i}. \"{chunk}\"" for i, chunk in enumerate(chunks, 1))
+
+    def _parse_poi_batch(self, response: str, n_chunks: int) -> List[str]:
+        """Maps a batched reply to one single-check style decision ("NO" / "INTERRUPT: ...") per chunk."""
+        decisions = ["NO"] * n_chunks
+        try:
+            entries = json.loads(response[response.index("["):response.rindex("]") + 1])
+            for entry in entries:
+                idx = int(entry["id"]) - 1
+                if 0 <= idx < n_chunks and str(entry.get("decision", "")).upper() == "INTERRUPT":
+                    decisions[idx] = f"INTERRUPT: {entry.get('reason', '')}"
+        except (ValueError, KeyError, TypeError, AttributeError):
+            for match in _POI_LINE_RE.finditer(response):
+                idx = int(match.group(1)) - 1
+                if 0 <= idx < n_chunks:
+                    decisions[idx] = f"INTERRUPT: {match.group(2)}"
+        return decisions
+
+    def _settle_poi(self, question: str, gov: DebaterAgent, opp: DebaterAgent, transcript: Transcript,
+                    opp_check_prompt: str, decision: str, n_chunks: int = 1) -> int:
+        """
+        Records one POI check (covering n_chunks speech chunks) and has the
+        Government answer each INTERRUPT, in chunk order.
+        Returns the number of interruptions.
+        """
+        opp.record_exchange(opp_check_prompt, decision)
+        decisions = [decision] if n_chunks == 1 else self._parse_poi_batch(decision, n_chunks)
+
+        interruptions = 0
+        for decision in decisions:
+            if "INTERRUPT:" in decision:
+                self._answer_poi(question, gov, opp, transcript, decision.split("INTERRUPT:", 1)[1].strip())
+                interruptions += 1
+        return interruptions
+
+    def _answer_poi(self, question: str, gov: DebaterAgent, opp: DebaterAgent, transcript: Transcript, reason: str):
+        transcript.append(opp.name, f"POI: {reason}")
+        
+        # Government has to address it briefly
+        gov_address_prompt = _GOV_ADDRESS_TMPL.format(question=question, reason=reason)
+        gov_response = gov.speak(gov_address_prompt)
+        transcript.append(gov.name, f"Response to POI: {gov_response}")
@@ -1,109 +1,186 @@
-from typing import List, Dict, Any
-from .base import DebateProtocol
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from .base import DebateProtocol, Transcript, cacheable_opening, FINAL_ANSWER_FORMAT, NO_EXTRA_TEXT, NO_TOOLS
 from ..agents.agent import DebaterAgent
+from ..llm.batcher import FinalAnswerBatcher
+
+# Stable opening of the Affirmative's first prompt; together with the item's context it forms the cached prefix
+AFF_PERSONA = "You are the Affirmative side in a congressional-style debate on a QA benchmark question.\n\n"
+NEG_PERSONA = "You are the Negative side in a congressional-style debate on a QA benchmark question.\n\n"
+
+# Matches both "Proposed Answer:" and "Opposition Proposed Answer:" lines
+_PROPOSED_RE = re.compile(r"Proposed Answer:[ \t]*(.*)")
+
+_SHORT_ANSWER_RULE = "   - The short answer should be just 'yes', 'no', a name, or a short noun phrase.\n"
+_STAY_FACTUAL = "Stay focused on factual correctness, not style or politics."
+
+_AFF_OPENING_TMPL = (
+    "Question: {question}\n\n"
+    "Your job:\n"
+    "1. Commit to a concrete short answer in the format: Proposed Answer: <short answer>.\n"
+    + _SHORT_ANSWER_RULE +
+    "2. Then justify your Proposed Answer with clear, factual reasoning in 3–6 sentences.\n"
+    "3. Focus on accuracy, not rhetoric. " + NO_TOOLS + "\n\n"
+    "End your response with a line starting with exactly: Proposed Answer: "
+)
+
+_NEG_OPENING_TMPL = (
+    "Question: {question}\n\n"
+    "Your job:\n"
+    "1. Work out independently which short answer is most likely correct; "
+    "you will critique the Affirmative's case in the rebuttals.\n"
+    + _SHORT_ANSWER_RULE +
+    "2. Justify it with clear, factual reasoning in at most 5 sentences.\n"
+    "3. End with a line:\n"
+    "   Opposition Proposed Answer: <short answer>\n"
+    + _STAY_FACTUAL
+)
+
+_NEG_CRITIQUE_TMPL = (
+    NEG_PERSONA +
+    "Question: {question}\n\n"
+    "The Affirmative side said:\n{aff_response}\n\n"
+    "Your job:\n"
+    "1. Identify any factual errors, gaps, or unjustified assumptions in the Affirmative's reasoning.\n"
+    "2. Decide whether you agree or disagree with the Affirmative's Proposed Answer.\n"
+    "3. If you disagree, provide your own alternative short answer.\n"
+    "4. Give at most 5 sentences of critique and reasoning.\n"
+    "5. End with two lines:\n"
+    "   Verdict: <AGREE or DISAGREE>\n"
+    "   Opposition Proposed Answer: <short answer or SAME as Affirmative>\n"
+    + _STAY_FACTUAL
+)
+
+_AFF_REBUTTAL_TMPL = (
+    "Question: {question}\n\n"
+    "The Negative side just said:\n{neg_response}\n\n"
+    "You are the Affirmative side responding in a rebuttal.\n"
+    "Your job:\n"
+    "1. Briefly defend your original reasoning where it is still sound (2–3 sentences).\n"
+    "2. Acknowledge any valid corrections from the Negative.\n"
+    "3. Decide whether to keep or change your Proposed Answer.\n"
+    "4. If you change it, explain why in at most 2 sentences.\n"
+    "5. End with a line: Proposed Answer: <your current best short answer>.\n"
+    "Keep the total response under 7 sentences."
+)
+
+_NEG_REBUTTAL_TMPL = (
+    "Question: {question}\n\n"
+    "The Affirmative side just said:\n{aff_response}\n\n"
+    "You are the Negative side responding in a rebuttal.\n"
+    "Your job:\n"
+    "1. Briefly summarize the Affirmative's current position (1–2 sentences).\n"
+    "2. Point out the single most important factual issue or uncertainty that remains (2–3 sentences).\n"
+    "3. Decide whether you still disagree with their Proposed Answer.\n"
+    "4. End with two lines:\n"
+    "   Verdict: <AGREE or DISAGREE>\n"
+    "   Opposition Proposed Answer: <your best short answer, or SAME as Affirmative>.\n"
+    "Keep everything tightly focused on which short answer is most likely correct."
+)
+
+_FINAL_TMPL = (
+    "You are the Affirmative side giving a final, concise answer to a QA benchmark question "
+    "after a congressional-style debate.\n\n"
+    "Question: {question}\n\n"
+    "Here are the latest speeches of the debate:\n"
+    "Affirmative (you):\n{aff_response}\n\n"
+    "Negative:\n{neg_response}\n\n"
+    "Proposed answers so far: Affirmative={aff_answer}, Negative={neg_answer}\n\n"
+    "Based on all arguments and critiques, decide the single best short answer to the question.\n"
+    "Output exactly ONE line in this format:\n"
+    + FINAL_ANSWER_FORMAT
+    + NO_EXTRA_TEXT
+)
 
 class AmericanCongressProtocol(DebateProtocol):
     """American Congress: Long-form speeches, but oriented around factual QA correctness."""
 
-    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 2, **kwargs) -> Dict[str, Any]:
+    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 2,
+            parallel_openings: bool = False, final_batcher: Optional[FinalAnswerBatcher] = None,
+            **kwargs) -> Dict[str, Any]:
+        """
+        With parallel_openings, the Negative opens with its own independent
+        answer instead of a critique of the Affirmative, so both openings are
+        generated at the same time; critique starts in the rebuttal rounds.
+        """
         if len(agents) != 2:
             raise ValueError("AmericanCongressProtocol requires exactly two agents (Affirmative, Negative).")
         
         aff, neg = agents
-        transcript = []
+        transcript = Transcript()
 
         # --- Round 1: Opening Statements ---
 
         # Affirmative Opening
-        aff_prompt = (
-            "You are the Affirmative side in a congressional-style debate on a QA benchmark question.\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {question}\n\n"
-            "Your job:\n"
-            "1. Commit to a concrete short answer in the format: Proposed Answer: <short answer>.\n"
-            "   - The short answer should be just 'yes', 'no', a name, or a short noun phrase.\n"
-            "2. Then justify your Proposed Answer with clear, factual reasoning in 3–6 sentences.\n"
-            "3. Focus on accuracy, not rhetoric. Do NOT mention using tools or browsing the web.\n\n"
-            "End your response with a line starting with exactly: Proposed Answer: "
-        )
-        aff_response = aff.speak(aff_prompt)
-        transcript.append({"role": aff.name, "content": aff_response})
-        neg.listen(aff_response)
-
-        # Negative Opening
-        neg_prompt = (
-            "You are the Negative side in a congressional-style debate on a QA benchmark question.\n\n"
-            f"Question: {question}\n\n"
-            f"The Affirmative side said:\n{aff_response}\n\n"
-            "Your job:\n"
-            "1. Identify any factual errors, gaps, or unjustified assumptions in the Affirmative's reasoning.\n"
-            "2. Decide whether you agree or disagree with the Affirmative's Proposed Answer.\n"
-            "3. If you disagree, provide your own alternative short answer.\n"
-            "4. Give at most 5 sentences of critique and reasoning.\n"
-            "5. End with two lines:\n"
-            "   Verdict: <AGREE or DISAGREE>\n"
-            "   Opposition Proposed Answer: <short answer or SAME as Affirmative>\n"
-            "Stay focused on factual correctness, not style or politics."
-        )
-        neg_response = neg.speak(neg_prompt)
-        transcript.append({"role": neg.name, "content": neg_response})
-        aff.listen(neg_response)
+        aff_prompt = cacheable_opening(AFF_PERSONA, context, _AFF_OPENING_TMPL.format(question=question))
+        if parallel_openings:
+            # Negative Opening, independent of the Affirmative's
+            neg_opening_prompt = cacheable_opening(NEG_PERSONA, context, _NEG_OPENING_TMPL.format(question=question))
+            # Each agent is only touched by its own worker until both return
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                aff_future = pool.submit(aff.speak, aff_prompt)
+                neg_future = pool.submit(neg.speak, neg_opening_prompt)
+                aff_response, neg_response = aff_future.result(), neg_future.result()
+
+            transcript.append(aff.name, aff_response)
+            transcript.append(neg.name, neg_response)
+            if neg.stateful:
+                neg.listen(aff_response)
+            if aff.stateful:
+                aff.listen(neg_response)
+        else:
+            aff_response = aff.speak(aff_prompt)
+            transcript.append(aff.name, aff_response)
+            if neg.stateful:
+                neg.listen(aff_response)
+
+            # Negative Opening
+            neg_response = neg.speak(self._neg_critique_prompt(question, aff_response))
+            transcript.append(neg.name, neg_response)
+            if aff.stateful:
+                aff.listen(neg_response)
 
         # --- Subsequent Rounds: Rebuttals ---
         for i in range(rounds - 1):
             # Affirmative Rebuttal
-            aff_rebuttal_prompt = (
-                f"Question: {question}\n\n"
-                f"The Negative side just said:\n{neg_response}\n\n"
-                "You are the Affirmative side responding in a rebuttal.\n"
-                "Your job:\n"
-                "1. Briefly defend your original reasoning where it is still sound (2–3 sentences).\n"
-                "2. Acknowledge any valid corrections from the Negative.\n"
-                "3. Decide whether to keep or change your Proposed Answer.\n"
-                "4. If you change it, explain why in at most 2 sentences.\n"
-                "5. End with a line: Proposed Answer: <your current best short answer>.\n"
-                "Keep the total response under 7 sentences."
-            )
+            aff_rebuttal_prompt = _AFF_REBUTTAL_TMPL.format(question=question, neg_response=neg_response)
             aff_response = aff.speak(aff_rebuttal_prompt)
-            transcript.append({"role": aff.name, "content": aff_response})
-            neg.listen(aff_response)
+            transcript.append(aff.name, aff_response)
+            if neg.stateful:
+                neg.listen(aff_response)
 
             # Negative Rebuttal
-            neg_rebuttal_prompt = (
-                f"Question: {question}\n\n"
-                f"The Affirmative side just said:\n{aff_response}\n\n"
-                "You are the Negative side responding in a rebuttal.\n"
-                "Your job:\n"
-                "1. Briefly summarize the Affirmative's current position (1–2 sentences).\n"
-                "2. Point out the single most important factual issue or uncertainty that remains (2–3 sentences).\n"
-                "3. Decide whether you still disagree with their Proposed Answer.\n"
-                "4. End with two lines:\n"
-                "   Verdict: <AGREE or DISAGREE>\n"
-                "   Opposition Proposed Answer: <your best short answer, or SAME as Affirmative>.\n"
-                "Keep everything tightly focused on which short answer is most likely correct."
-            )
+            neg_rebuttal_prompt = _NEG_REBUTTAL_TMPL.format(question=question, aff_response=aff_response)
             neg_response = neg.speak(neg_rebuttal_prompt)
-            transcript.append({"role": neg.name, "content": neg_response})
-            aff.listen(neg_response)
+            transcript.append(neg.name, neg_response)
+            if aff.stateful:
+                aff.listen(neg_response)
 
         # --- Final Answer Step (Affirmative wraps up) ---
-        final_prompt = (
-            "You are the Affirmative side giving a final, concise answer to a QA benchmark question "
-            "after a congressional-style debate.\n\n"
-            f"Question: {question}\n\n"
-            "Here is the debate transcript (your speeches and the Negative's speeches):\n"
-            f"{transcript}\n\n"
-            "Based on all arguments and critiques, decide the single best short answer to the question.\n"
-            "Output exactly ONE line in this format:\n"
-            "Final Answer: <one short answer only (e.g. 'yes', 'no', a name, or a short noun phrase)>\n\n"
-            "Do NOT include any reasoning, explanations, or extra text."
+        # Only the latest exchange is passed back, so the final prompt stays
+        # the same size however many rounds were debated
+        final_prompt = _FINAL_TMPL.format(
+            question=question,
+            aff_response=aff_response,
+            neg_response=neg_response,
+            aff_answer=self._proposed_answer(aff_response),
+            neg_answer=self._proposed_answer(neg_response),
         )
-        final_response = aff.speak(final_prompt)
-        transcript.append({"role": aff.name, "content": final_response})
+        final_response = self._speak_final(aff, final_prompt, final_batcher)
+        transcript.append(aff.name, final_response)
 
         return {
             "protocol": "AmericanCongress",
             "question": question,
-            "transcript": transcript,
+            "transcript": transcript.to_list(),
             "final_answer": self._extract_final_answer(final_response),
         }
+
+    def _proposed_answer(self, response: str) -> str:
+        """The last proposed answer line in a speech, or 'unknown' if there is none."""
+        answers = _PROPOSED_RE.findall(response)
+        return answers[-1].strip() if answers else "unknown"
+
+    def _neg_critique_prompt(self, question: str, aff_response: str) -> str:
+        return _NEG_CRITIQUE_TMPL.format(question=question, aff_response=aff_response)
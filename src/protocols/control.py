@@ -1,26 +1,84 @@
-from typing import List, Dict, Any
-from .base import DebateProtocol
+from typing import List, Dict, Any, Optional
+from .base import DebateProtocol, cacheable_opening, FINAL_ANSWER_FORMAT, FINAL_ANSWER_MARKER, NO_EXTRA_TEXT
 from ..agents.agent import DebaterAgent
+from ..llm.base import Prompt
+from ..llm.cache import DEFAULT_CACHE_PATH, get_response_cache, provider_model_id
+
+# Stable opening of the CoT prompt; together with the item's context it forms the cached prefix
+SOLVER_PERSONA = "You are answering a question from a QA benchmark.\n\n"
+
+_SOLVER_TMPL = (
+    "Question: {question}\n\n"
+    "1. Think step by step and write a short reasoning (no more than 4 sentences).\n"
+    "2. Then, on a new line, give your final answer in EXACTLY this format:\n"
+    "Final Answer: <one short answer only (for example: 'yes', 'no', a name, or a short noun phrase)>\n\n"
+    "Do NOT include any extra text after that final answer line, and do NOT mention using tools or browsing."
+)
+
+# Fallback when the reasoning ends without a Final Answer line
+_EXTRACT_TMPL = (
+    "Given this reasoning about a QA benchmark question:\n\n"
+    "Question: {question}\n\n"
+    "Reasoning:\n{response}\n\n"
+    "Extract the short answer it arrives at. Output exactly ONE line in this format:\n"
+    + FINAL_ANSWER_FORMAT
+    + NO_EXTRA_TEXT
+)
 
 class SingleCoTProtocol(DebateProtocol):
     """Control protocol: Single agent with Chain-of-Thought."""
 
-    def run(self, question: str, agents: List[DebaterAgent], context: str = "", **kwargs) -> Dict[str, Any]:
+    supports_batch = True
+
+    def run(self, question: str, agents: List[DebaterAgent], context: str = "", cache: bool = False,
+            cache_path: str = DEFAULT_CACHE_PATH, cheap_agent: Optional[DebaterAgent] = None,
+            **kwargs) -> Dict[str, Any]:
+        """
+        With cache=True, responses are stored in a persistent SQLite cache
+        (see llm/cache.py) and a repeated (model, prompt) pair is answered from
+        it without an LLM call. Off by default, since repeated runs are meant
+        to sample fresh responses.
+
+        With a cheap_agent (typically on a smaller model), a response that
+        lacks a Final Answer line is handed to it to extract the answer,
+        rather than scoring the whole reasoning text. The call is stateless, so
+        one cheap_agent can be shared across items.
+        """
         if len(agents) != 1:
             raise ValueError("SingleCoTProtocol requires exactly one agent.")
         
         agent = agents[0]
-        prompt = (
-            "You are answering a question from a QA benchmark.\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {question}\n\n"
-            "1. Think step by step and write a short reasoning (no more than 4 sentences).\n"
-            "2. Then, on a new line, give your final answer in EXACTLY this format:\n"
-            "Final Answer: <one short answer only (for example: 'yes', 'no', a name, or a short noun phrase)>\n\n"
-            "Do NOT include any extra text after that final answer line, and do NOT mention using tools or browsing."
-        )
-        response = agent.speak(prompt)
-        
+        prompt = self.build_prompt(question, context)
+        if cache:
+            response = self._cached_speak(agent, prompt, cache_path)
+        else:
+            response = agent.speak(prompt)
+        result = self.build_result(question, agent, response)
+
+        if cheap_agent is not None and FINAL_ANSWER_MARKER not in response:
+            extracted = cheap_agent.respond(_EXTRACT_TMPL.format(question=question, response=response))
+            result["transcript"].append({"role": cheap_agent.name, "content": extracted})
+            result["final_answer"] = self._extract_final_answer(extracted)
+        return result
+
+    def _cached_speak(self, agent: DebaterAgent, prompt: Prompt, cache_path: str) -> str:
+        """agent.speak(prompt), answered from the response cache when possible."""
+        response_cache = get_response_cache(cache_path)
+        full_prompt, system_prompt = agent.build_request(prompt)
+        key = response_cache.key(provider_model_id(agent.provider), full_prompt, system_prompt)
+        response = response_cache.get(key)
+        if response is None:
+            response = agent.respond(prompt)
+            response_cache.put(key, response)
+        agent.record_exchange(prompt, response)
+        return response
+
+    def build_prompt(self, question: str, context: str = "") -> Prompt:
+        """The single prompt this protocol sends for a question."""
+        return cacheable_opening(SOLVER_PERSONA, context, _SOLVER_TMPL.format(question=question))
+
+    def build_result(self, question: str, agent: DebaterAgent, response: str) -> Dict[str, Any]:
+        """Turns the agent's response into the protocol result dict."""
         return {
             "protocol": "SingleCoT",
             "question": question,
@@ -0,0 +1,17 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+# Response models for protocols run with structured=True (see
+# LLMProvider.generate_structured)
+
+
+class POIDecision(BaseModel):
+    """The Opposition's private decision on one speech chunk."""
+    interrupt: bool
+    reason: Optional[str] = None
+
+
+class FinalAnswer(BaseModel):
+    """A closing answer: one short answer only."""
+    answer: str
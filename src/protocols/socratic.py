@@ -1,85 +1,181 @@
-from typing import List, Dict, Any
-from .base import DebateProtocol
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from .base import DebateProtocol, Transcript, cacheable_opening, FINAL_ANSWER_FORMAT, NO_EXTRA_TEXT, SHORT_ANSWER_EXAMPLES
 from ..agents.agent import DebaterAgent
+from ..llm.batcher import FinalAnswerBatcher
+
+# Stable opening of the Student's first prompt; together with the item's context it forms the cached prefix
+STUDENT_PERSONA = "You are a careful but concise student answering a question in a QA exam.\n\n"
+
+_STUDENT_TMPL = (
+    "Question: {question}\n\n"
+    "1. Think step by step and write a short reasoning (no more than 4 sentences).\n"
+    "2. Then on a new line, write: Provisional Answer: <your best short answer in a few words "
+    + SHORT_ANSWER_EXAMPLES + ">.\n"
+    "Do NOT browse the web; rely only on your knowledge and reasoning."
+)
+
+# Appended after the dialogue so far on every Socrates turn
+_SOCRATES_INSTRUCTIONS = (
+    "\n\n"
+    "You are Socrates helping the student improve factual accuracy on this QA task.\n"
+    "Your job:\n"
+    "- Look for ONE concrete possible mistake, missing link, or ambiguity in the "
+    "student's reasoning or Provisional Answer, directly related to the question.\n"
+    "- Ask exactly ONE short question that targets that issue and could help the student "
+    "correct or refine the answer.\n"
+    "- Do NOT explain the answer, do NOT introduce long philosophical reflections, and do NOT "
+    "discuss why the question might have been asked.\n\n"
+    "Output ONLY your question, nothing else."
+)
+
+# Fused mode: the Student asks itself Socrates' question and answers it in one call
+_FUSED_INSTRUCTIONS = (
+    "\n\n"
+    "You are the student, now questioning your own answer the way Socrates would.\n"
+    "1. Look for ONE concrete possible mistake, missing link, or ambiguity in your reasoning or "
+    "Provisional Answer, directly related to the question, and write exactly ONE short question "
+    "that targets it, on a line starting with: Critique Question:\n"
+    "2. Then, on a new line starting with: Revised Answer:, answer that question and briefly update or "
+    "defend your reasoning in at most 3 sentences.\n"
+    "3. End with: Provisional Answer: <your best updated short answer in a few words>.\n"
+    "Keep everything focused strictly on answering the question correctly."
+)
+_FUSED_RE = re.compile(r"Critique Question:\s*(.*?)\s*Revised Answer:\s*(.*)", re.DOTALL)
+
+_STUDENT_REPLY_TMPL = (
+    "You are revising your answer to a QA exam question.\n\n"
+    "Question: {question}\n"
+    "Socrates asked: {socrates_response}\n\n"
+    "1. Briefly update or defend your reasoning in at most 3 sentences.\n"
+    "2. If needed, update your Provisional Answer.\n"
+    "3. End with: Provisional Answer: <your best updated short answer in a few words>.\n"
+    "Keep everything focused strictly on answering the question correctly."
+)
+
+_SUMMARY_TMPL = (
+    "You are now giving the final answer to a QA benchmark question.\n\n"
+    "Question: {question}\n\n"
+    "Here is your previous reasoning and dialogue with Socrates:\n"
+    "{dialogue}\n\n"
+    "Using that, output exactly ONE line in this format:\n"
+    + FINAL_ANSWER_FORMAT
+    + NO_EXTRA_TEXT + " Only that one line."
+)
 
 class SocraticDialogueProtocol(DebateProtocol):
     """Socratic Dialogue: One agent answers, another questions/corrects."""
 
-    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 1, **kwargs) -> Dict[str, Any]:
+    def run(self, question: str, agents: List[DebaterAgent], context: str = "", rounds: int = 1,
+            stable_rounds: int = 2, fused: bool = False, final_batcher: Optional[FinalAnswerBatcher] = None,
+            **kwargs) -> Dict[str, Any]:
+        """
+        Stops questioning once the Student's Provisional Answer has been left
+        unchanged for `stable_rounds` consecutive rounds (0 disables this); the
+        converged answer is then reported directly instead of asking for a
+        final summary.
+
+        With fused=True, every other round (starting with the first) is a
+        single call in which the Student poses Socrates' question to itself
+        and answers it; Socrates still asks in the rounds between, as a check.
+        """
         if len(agents) != 2:
             raise ValueError("SocraticDialogueProtocol requires exactly two agents (Student, Socrates).")
         
         student, socrates = agents
-        transcript = []
+        transcript = Transcript()
         
         # 1) Initial attempt by Student
-        student_prompt = (
-            "You are a careful but concise student answering a question in a QA exam.\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {question}\n\n"
-            "1. Think step by step and write a short reasoning (no more than 4 sentences).\n"
-            "2. Then on a new line, write: Provisional Answer: <your best short answer in a few words "
-            "(e.g. 'yes', 'no', a name, or a short noun phrase)>.\n"
-            "Do NOT browse the web; rely only on your knowledge and reasoning."
-        )
+        student_prompt = cacheable_opening(STUDENT_PERSONA, context, _STUDENT_TMPL.format(question=question))
         student_response = student.speak(student_prompt)
-        transcript.append({"role": student.name, "content": student_response})
+        transcript.append(student.name, student_response)
+        provisional = self._extract_provisional_answer(student_response)
+        unchanged = 0
+        converged = False
         
-        current_context = f"Question: {question}\nStudent's Answer:\n{student_response}"
+        # The dialogue so far, append-only: each round's Socrates prompt
+        # starts with the previous round's, so it stays a cacheable prefix
+        context_parts = [f"Question: {question}\nStudent's Answer:\n{student_response}"]
         
         # 2) Socratic rounds
         for i in range(rounds):
-            # Socrates: ask one targeted factual question
-            socrates_prompt = (
-                f"{current_context}\n\n"
-                "You are Socrates helping the student improve factual accuracy on this QA task.\n"
-                "Your job:\n"
-                "- Look for ONE concrete possible mistake, missing link, or ambiguity in the "
-                "student's reasoning or Provisional Answer, directly related to the question.\n"
-                "- Ask exactly ONE short question that targets that issue and could help the student "
-                "correct or refine the answer.\n"
-                "- Do NOT explain the answer, do NOT introduce long philosophical reflections, and do NOT "
-                "discuss why the question might have been asked.\n\n"
-                "Output ONLY your question, nothing else."
-            )
-            socrates_response = socrates.speak(socrates_prompt)
-            transcript.append({"role": socrates.name, "content": socrates_response})
-            student.listen(socrates_response)
-            
-            current_context += f"\nSocrates: {socrates_response}"
-            
-            # Student revises answer
-            student_reply_prompt = (
-                f"You are revising your answer to a QA exam question.\n\n"
-                f"Question: {question}\n"
-                f"Socrates asked: {socrates_response}\n\n"
-                "1. Briefly update or defend your reasoning in at most 3 sentences.\n"
-                "2. If needed, update your Provisional Answer.\n"
-                "3. End with: Provisional Answer: <your best updated short answer in a few words>.\n"
-                "Keep everything focused strictly on answering the question correctly."
-            )
-            student_response = student.speak(student_reply_prompt)
-            transcript.append({"role": student.name, "content": student_response})
-            socrates.listen(student_response)
-            
-            current_context += f"\nStudent: {student_response}"
+            if fused and i % 2 == 0:
+                socrates_response, student_response = self._fused_round(student, socrates, transcript, context_parts)
+            else:
+                socrates_response, student_response = self._socratic_round(question, student, socrates, transcript, context_parts)
+
+            answer = self._extract_provisional_answer(student_response)
+            unchanged = unchanged + 1 if answer is not None and answer == provisional else 0
+            provisional = answer
+            if stable_rounds and unchanged >= stable_rounds:
+                converged = True
+                break
 
         # 3) Final succinct answer
-        summary_prompt = (
-            "You are now giving the final answer to a QA benchmark question.\n\n"
-            f"Question: {question}\n\n"
-            "Here is your previous reasoning and dialogue with Socrates:\n"
-            f"{current_context}\n\n"
-            "Using that, output exactly ONE line in this format:\n"
-            "Final Answer: <one short answer only (e.g. 'yes', 'no', a name, or a short noun phrase)>\n\n"
-            "Do NOT include any reasoning, explanations, or extra text. Only that one line."
-        )
-        final_response = student.speak(summary_prompt)
-        transcript.append({"role": student.name, "content": final_response})
+        if converged:
+            # The Student has settled; restate the answer without another call
+            final_response = f"Final Answer: {provisional}"
+            transcript.append(student.name, final_response)
+            return {
+                "protocol": "SocraticDialogue",
+                "question": question,
+                "transcript": transcript.to_list(),
+                "final_answer": provisional,
+            }
+
+        summary_prompt = _SUMMARY_TMPL.format(question=question, dialogue="".join(context_parts))
+        final_response = self._speak_final(student, summary_prompt, final_batcher)
+        transcript.append(student.name, final_response)
 
         return {
             "protocol": "SocraticDialogue",
             "question": question,
-            "transcript": transcript,
+            "transcript": transcript.to_list(),
             "final_answer": self._extract_final_answer(final_response),
         }
+
+    def _socratic_round(self, question: str, student: DebaterAgent, socrates: DebaterAgent,
+                        transcript: Transcript, context_parts: List[str]) -> Tuple[str, str]:
+        """Socrates asks one targeted question and the Student revises. Returns (question, reply)."""
+        # Socrates: ask one targeted factual question
+        socrates_prompt = [{"type": "text", "text": part} for part in context_parts]
+        socrates_prompt[-1]["cache_control"] = {"type": "ephemeral"}
+        socrates_prompt.append({"type": "text", "text": _SOCRATES_INSTRUCTIONS})
+        socrates_response = socrates.speak(socrates_prompt)
+        transcript.append(socrates.name, socrates_response)
+        if student.stateful:
+            student.listen(socrates_response)
+        
+        context_parts.append(f"\nSocrates: {socrates_response}")
+        
+        # Student revises answer
+        student_reply_prompt = _STUDENT_REPLY_TMPL.format(question=question, socrates_response=socrates_response)
+        student_response = student.speak(student_reply_prompt)
+        transcript.append(student.name, student_response)
+        if socrates.stateful:
+            socrates.listen(student_response)
+        
+        context_parts.append(f"\nStudent: {student_response}")
+        return socrates_response, student_response
+
+    def _fused_round(self, student: DebaterAgent, socrates: DebaterAgent,
+                     transcript: Transcript, context_parts: List[str]) -> Tuple[str, str]:
+        """The Student questions and revises its own answer in one call. Returns (question, reply)."""
+        fused_prompt = [{"type": "text", "text": part} for part in context_parts]
+        fused_prompt[-1]["cache_control"] = {"type": "ephemeral"}
+        fused_prompt.append({"type": "text", "text": _FUSED_INSTRUCTIONS})
+        fused_response = student.speak(fused_prompt)
+        match = _FUSED_RE.search(fused_response)
+        if match:
+            socrates_response, student_response = match.group(1), match.group(2)
+        else:
+            socrates_response, student_response = "", fused_response
+        transcript.append(student.name, fused_response)
+        # Socrates hears the exchange as if it had asked the question
+        if socrates.stateful:
+            socrates.listen(socrates_response)
+            socrates.listen(student_response)
+
+        context_parts.append(f"\nSocrates: {socrates_response}")
+        context_parts.append(f"\nStudent: {student_response}")
+        return socrates_response, student_response
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+CWD = os.getcwd()
+TMP = tempfile.TemporaryDirectory()
+# analyze_stats creates its output directory on import, relative to the cwd
+os.chdir(TMP.name)
+try:
+    import analyze_stats
+finally:
+    os.chdir(CWD)
+
+
+def tearDownModule():
+    TMP.cleanup()
+
+
+class RunsCacheTest(unittest.TestCase):
+    def setUp(self):
+        os.chdir(TMP.name)
+        for run_id, accuracy in ((1, 0.5), (2, 0.75)):
+            os.makedirs(f"runs/run_{run_id}", exist_ok=True)
+            with open(f"runs/run_{run_id}/summary.json", "w") as f:
+                json.dump({"run_id": run_id, "protocols": {"CoT": {
+                    "accuracy": accuracy, "prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15,
+                }}}, f)
+        self.expected = analyze_stats.load_all_runs()
+
+    def tearDown(self):
+        os.chdir(CWD)
+
+    def _reload(self):
+        """load_all_runs(), returning (frame, number of summaries it re-parsed)."""
+        with mock.patch.object(analyze_stats, "parse_summaries", wraps=analyze_stats.parse_summaries) as parse:
+            df = analyze_stats.load_all_runs()
+        return df, sum(len(call.args[0]) for call in parse.call_args_list)
+
+    def test_unchanged_runs_come_from_the_cache(self):
+        df, parsed = self._reload()
+        self.assertEqual(parsed, 0)
+        self.assertTrue(df.equals(self.expected))
+
+    def test_corrupt_parquet_is_rebuilt(self):
+        with open(analyze_stats.RUNS_CACHE, "r+b") as f:
+            f.truncate(16)
+        df, parsed = self._reload()
+        self.assertEqual(parsed, 2)
+        self.assertTrue(df.equals(self.expected))
+
+    def test_other_cache_version_is_rebuilt(self):
+        with open(analyze_stats.RUNS_MANIFEST) as f:
+            manifest = json.load(f)
+        manifest["version"] = analyze_stats.CACHE_VERSION - 1
+        with open(analyze_stats.RUNS_MANIFEST, "w") as f:
+            json.dump(manifest, f)
+        df, parsed = self._reload()
+        self.assertEqual(parsed, 2)
+        self.assertTrue(df.equals(self.expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+
+from src.agents.agent import DebaterAgent
+from src.experiment.runner import ExperimentRunner
+from src.llm.base import BatchRequestError
+from src.llm.batcher import FinalAnswerBatcher
+from src.llm.mock import MockProvider
+from src.protocols.congress import AmericanCongressProtocol
+
+
+class ShortBatchProvider(MockProvider):
+    """A batch endpoint that loses the last response."""
+
+    def batch_generate(self, prompts):
+        return [self.generate(prompt, system_prompt) for prompt, system_prompt in prompts[:-1]]
+
+
+class PartlyFailedBatchProvider(MockProvider):
+    """A batch endpoint whose second request failed."""
+
+    def batch_generate(self, prompts):
+        responses = [self.generate(prompt, system_prompt) for prompt, system_prompt in prompts]
+        responses[1] = BatchRequestError("request 1 failed")
+        return responses
+
+
+class FinalAnswerBatcherTest(unittest.TestCase):
+    def test_short_batch_fails_every_future(self):
+        batcher = FinalAnswerBatcher(ShortBatchProvider(), max_batch=3, max_wait=60)
+        futures = [batcher.submit(f"prompt {i}") for i in range(3)]
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=1)
+
+    def test_failed_request_fails_only_its_future(self):
+        batcher = FinalAnswerBatcher(PartlyFailedBatchProvider(), max_batch=3, max_wait=60)
+        futures = [batcher.submit(f"prompt {i}") for i in range(3)]
+        with self.assertRaises(BatchRequestError):
+            futures[1].result(timeout=1)
+        self.assertEqual(futures[0].result(timeout=1), MockProvider().generate("prompt 0"))
+        self.assertEqual(futures[2].result(timeout=1), MockProvider().generate("prompt 2"))
+
+
+    def test_serial_runs_reject_a_batcher(self):
+        provider = MockProvider()
+        batcher = FinalAnswerBatcher(provider)
+        agents = [DebaterAgent("Affirmative", provider, "x"), DebaterAgent("Negative", provider, "y")]
+        with self.assertRaises(ValueError):
+            AmericanCongressProtocol().run_many(
+                [{"question": "Q?", "agents": agents, "final_batcher": batcher}], max_concurrency=1
+            )
+        with tempfile.TemporaryDirectory() as tmp, self.assertRaises(ValueError):
+            ExperimentRunner(provider, output_dir=tmp).run_experiment(
+                AmericanCongressProtocol, "fake", final_batcher=batcher
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
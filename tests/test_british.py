@@ -0,0 +1,54 @@
+import unittest
+
+from src.protocols.british import BritishParliamentaryProtocol
+
+
+class POIPrefilterTest(unittest.TestCase):
+    def setUp(self):
+        self.protocol = BritishParliamentaryProtocol()
+
+    def test_ordinary_chunks_are_skipped(self):
+        for chunk in [
+            "This argument is stronger because it fits the evidence better.",
+            "We must look at all the facts, and every one of them only once.",
+            "The answer is Paris, and I think that holds up well.",
+        ]:
+            self.assertFalse(self.protocol._worth_poi(chunk), chunk)
+
+    def test_checkable_claims_are_kept(self):
+        for chunk in [
+            "He was born in 1961 and moved away later.",
+            "Over two million people live in the region today.",
+            "It was signed by Barack Obama at the time.",
+            "That has never been the case for this kind of question.",
+        ]:
+            self.assertTrue(self.protocol._worth_poi(chunk), chunk)
+
+
+
+class POIBatchParseTest(unittest.TestCase):
+    def setUp(self):
+        self.protocol = BritishParliamentaryProtocol()
+
+    def test_json_reply(self):
+        response = (
+            'Here you go: [{"id": 1, "decision": "NO"}, '
+            '{"id": 2, "decision": "interrupt", "reason": "Wrong year."}, '
+            '{"id": 7, "decision": "INTERRUPT", "reason": "Out of range."}]'
+        )
+        self.assertEqual(self.protocol._parse_poi_batch(response, 3), ["NO", "INTERRUPT: Wrong year.", "NO"])
+
+    def test_line_fallback(self):
+        response = "1: NO\n2. INTERRUPT: Wrong year.\n(3) INTERRUPT: Not the capital."
+        self.assertEqual(
+            self.protocol._parse_poi_batch(response, 3),
+            ["NO", "INTERRUPT: Wrong year.", "INTERRUPT: Not the capital."],
+        )
+
+    def test_garbage_means_no_interruptions(self):
+        for response in ["", "I cannot decide.", "[not json", '[{"decision": "INTERRUPT"}]']:
+            self.assertEqual(self.protocol._parse_poi_batch(response, 2), ["NO", "NO"], response)
+
+
+if __name__ == "__main__":
+    unittest.main()
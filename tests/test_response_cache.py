@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from src.llm.cache import ResponseCache, get_response_cache
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "responses.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        cache = ResponseCache(self.path)
+        key = ResponseCache.key("OpenAIProvider:gpt-4o-mini", "Question?", "system")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "answer")
+        self.assertEqual(cache.get(key), "answer")
+        # Persisted: a fresh connection to the same file sees it
+        self.assertEqual(ResponseCache(self.path).get(key), "answer")
+
+    def test_key_depends_on_model(self):
+        cache = ResponseCache(self.path)
+        cache.put(ResponseCache.key("OpenAIProvider:gpt-4o-mini", "Question?", None), "answer")
+        other = ResponseCache.key("OpenAIProvider:gpt-4o", "Question?", None)
+        self.assertNotEqual(other, ResponseCache.key("OpenAIProvider:gpt-4o-mini", "Question?", None))
+        self.assertIsNone(cache.get(other))
+
+    def test_block_and_string_prompts_share_a_key(self):
+        blocks = [{"type": "text", "text": "Ques", "cache_control": {"type": "ephemeral"}}, {"type": "text", "text": "tion?"}]
+        self.assertEqual(ResponseCache.key("m", blocks, None), ResponseCache.key("m", "Question?", None))
+
+    def test_get_response_cache_shares_one_instance_per_path(self):
+        first = get_response_cache(self.path)
+        self.assertIs(get_response_cache(self.path), first)
+        self.assertIs(get_response_cache(os.path.relpath(self.path)), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
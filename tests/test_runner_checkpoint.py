@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from src.experiment.runner import ExperimentRunner
+from src.llm.mock import MockProvider
+from src.protocols.control import SingleCoTProtocol
+
+ITEMS = [{"question": f"Question {i}?", "answer": "mock", "context": ""} for i in range(6)]
+
+
+class FixedItemsRunner(ExperimentRunner):
+    """Serves a fixed item list instead of loading a dataset."""
+
+    def _load_items(self, dataset_name, limit, start, end):
+        data = ITEMS[start:end]
+        return data, start + len(data)
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.runner = FixedItemsRunner(MockProvider(), output_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _checkpoint_lines(self, filepath):
+        with open(filepath + ".jsonl", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_rerun_then_resume_counts_each_item_once(self):
+        output_file = os.path.join(self.tmp.name, "cot.json")
+
+        # Two fresh runs to the default path: the second must replace, not extend, the checkpoint
+        self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1)
+        meta = self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1)
+        default_path = os.path.join(self.tmp.name, "SingleCoTProtocol_fake_0_5.json")
+        self.assertEqual(len(self._checkpoint_lines(default_path)), len(ITEMS))
+        self.assertEqual(meta["total_count"], len(ITEMS))
+
+        # Same with an explicit output file, then a resume that has nothing left to do
+        self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1, end=3, output_file=output_file)
+        self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1, output_file=output_file)
+        meta = self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1, output_file=output_file)
+        self.assertEqual(len(self._checkpoint_lines(output_file)), len(ITEMS))
+        self.assertEqual(meta["total_count"], len(ITEMS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import re
+import tempfile
+import time
+import unittest
+
+from src.experiment.runner import ExperimentRunner
+from src.llm.base import flatten_prompt
+from src.llm.mock import MockProvider
+from src.protocols.control import SingleCoTProtocol
+
+ITEMS = [{"question": f"Question {i}?", "answer": "mock", "context": ""} for i in range(6)]
+
+
+class FixedItemsRunner(ExperimentRunner):
+    """Serves a fixed item list instead of loading a dataset."""
+
+    def _load_items(self, dataset_name, limit, start, end):
+        data = ITEMS[start:end]
+        return data, start + len(data)
+
+
+class SlowFirstProvider(MockProvider):
+    """Answers earlier questions more slowly, so items finish in reverse order; Question 2 fails."""
+
+    def generate(self, prompt, system_prompt=None):
+        n = int(re.search(r"Question (\d+)\?", flatten_prompt(prompt)).group(1))
+        self.add_usage(prompt_tokens=10, completion_tokens=5)
+        time.sleep((len(ITEMS) - n) * 0.02)
+        if n == 2:
+            raise RuntimeError("provider failure")
+        return super().generate(prompt, system_prompt)
+
+
+class ConcurrencyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.runner = FixedItemsRunner(SlowFirstProvider(), output_dir=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _results(self, max_concurrency):
+        self.runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1, max_concurrency=max_concurrency)
+        with open(f"{self.tmp.name}/SingleCoTProtocol_fake_0_5.json", encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+    def test_concurrent_results_follow_dataset_order(self):
+        results = self._results(max_concurrency=len(ITEMS))
+        self.assertEqual([r["question"] for r in results], [item["question"] for item in ITEMS])
+
+    def test_token_usage_only_recorded_for_serial_runs(self):
+        serial = self._results(max_concurrency=1)
+        self.assertEqual(serial[2]["token_usage"]["total_tokens"], 15)
+
+        concurrent = self._results(max_concurrency=len(ITEMS))
+        self.assertIn("error", concurrent[2])
+        self.assertNotIn("token_usage", concurrent[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import re
+import tempfile
+import unittest
+
+from src.experiment.runner import ExperimentRunner
+from src.llm.base import flatten_prompt
+from src.llm.mock import MockProvider
+from src.protocols.control import SingleCoTProtocol
+
+ITEMS = [{"question": f"Question {i}?", "answer": f"answer{i}", "context": ""} for i in range(6)]
+
+
+class FixedItemsRunner(ExperimentRunner):
+    """Serves a fixed item list instead of loading a dataset."""
+
+    def _load_items(self, dataset_name, limit, start, end):
+        data = ITEMS[start:end]
+        return data, start + len(data)
+
+
+class ShuffledAnswersProvider(MockProvider):
+    """Answers a marshaled prompt in reverse order and leaves out its second question."""
+
+    def generate(self, prompt, system_prompt=None):
+        questions = re.findall(r"Question: Question (\d+)\?", flatten_prompt(prompt))
+        lines = [f"Answer {n}: answer{q}" for n, q in enumerate(questions, 1) if n != 2]
+        return "\n".join(reversed(lines))
+
+
+class RowMarshalTest(unittest.TestCase):
+    def test_answers_are_matched_by_number(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = FixedItemsRunner(ShuffledAnswersProvider(), output_dir=tmp)
+            meta = runner.run_experiment(SingleCoTProtocol, "fake", num_agents=1, row_marshal_batch=3)
+            with open(f"{tmp}/SingleCoTProtocol_fake_0_5.json", encoding="utf-8") as f:
+                results = json.load(f)["results"]
+
+        by_question = {r["question"]: r for r in results}
+        # Reordered answers still land on their own items
+        for i in (0, 2, 3, 5):
+            self.assertEqual(by_question[f"Question {i}?"]["final_answer"], f"answer{i}")
+            self.assertTrue(by_question[f"Question {i}?"]["is_correct"])
+        # A skipped number leaves its item unanswered rather than shifting the others onto it
+        for i in (1, 4):
+            self.assertEqual(by_question[f"Question {i}?"]["final_answer"], "")
+            self.assertFalse(by_question[f"Question {i}?"]["is_correct"])
+        self.assertEqual((meta["correct_count"], meta["total_count"]), (4, 6))
+
+
+if __name__ == "__main__":
+    unittest.main()
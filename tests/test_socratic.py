@@ -0,0 +1,57 @@
+import unittest
+from itertools import cycle
+
+from src.agents.agent import DebaterAgent
+from src.llm.base import flatten_prompt
+from src.llm.mock import MockProvider
+from src.protocols.socratic import SocraticDialogueProtocol
+
+
+class ScriptedProvider(MockProvider):
+    """Plays Socrates, the summary turn and a Student whose Provisional Answers come from `answers`."""
+
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = cycle(answers)
+        self.socrates_calls = 0
+        self.summary_calls = 0
+
+    def generate(self, prompt, system_prompt=None):
+        text = flatten_prompt(prompt)
+        if "You are now giving the final answer" in text:
+            self.summary_calls += 1
+            return "Final Answer: Lyon"
+        if "You are Socrates helping" in text:
+            self.socrates_calls += 1
+            return "Are you sure about that?"
+        return f"Some reasoning.\nProvisional Answer: {next(self.answers)}"
+
+
+class StableRoundsTest(unittest.TestCase):
+    def _run(self, provider, stable_rounds=2):
+        agents = [DebaterAgent("Student", provider, "s"), DebaterAgent("Socrates", provider, "q")]
+        return SocraticDialogueProtocol().run("Which city?", agents, rounds=4, stable_rounds=stable_rounds)
+
+    def test_converged_answer_skips_the_summary_call(self):
+        provider = ScriptedProvider(["Paris"])
+        result = self._run(provider)
+        self.assertEqual(provider.summary_calls, 0)
+        self.assertEqual(provider.socrates_calls, 2)
+        self.assertEqual(result["final_answer"], "Paris")
+        self.assertEqual(result["transcript"][-1]["content"], "Final Answer: Paris")
+
+    def test_unsettled_answer_still_gets_a_summary(self):
+        provider = ScriptedProvider(["Paris", "Lyon"])
+        result = self._run(provider)
+        self.assertEqual(provider.summary_calls, 1)
+        self.assertEqual(provider.socrates_calls, 4)
+        self.assertEqual(result["final_answer"], "Lyon")
+
+    def test_zero_stable_rounds_disables_the_shortcut(self):
+        provider = ScriptedProvider(["Paris"])
+        self._run(provider, stable_rounds=0)
+        self.assertEqual(provider.summary_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()